@@ -0,0 +1,252 @@
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from core.disk_cache import DiskFeatureCache
+from core.features import extract_features
+from core.functions import *
+from core.parallel import ParallelFrameExecutor
+from core.signal_store import SignalStore
+
+WINDOWS = {
+    'none': None,
+    'rectangular': rectangular_window,
+    'bartlett': bartlett_window,
+    'hann': hann_window,
+    'hamming': hamming_window,
+    'blackman': blackman_window
+}
+
+SUMMARY_FILE = 'summary.csv'
+SUMMARY_FIELDS = ['file', 'duration', 'lster', 'hzcrr', 'ste', 'zcr', 'acf', 'amd']
+# parameters that change extract_features results
+CACHE_KEY_PARAMS = ['frame_len', 'frame_hop', 'lag', 'freq_0', 'freq_1', 'window', 'channels', 'precision',
+                    'decimate_pitch']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Extract audio features from WAV files without the GUI.')
+    parser.add_argument('inputs', nargs='*', help='WAV files or directories searched recursively for WAV files')
+    parser.add_argument('--file-list', help='text file with one WAV path per line')
+    parser.add_argument('-o', '--output-dir', required=True, help='directory for feature files')
+    parser.add_argument('--format', choices=['csv', 'npz'], default='csv', help='per-frame output format')
+    parser.add_argument('--frame-len', type=int, default=25, help='frame length (ms)')
+    parser.add_argument('--frame-hop', type=int, default=10, help='frame step (ms)')
+    parser.add_argument('--lag', type=int, default=10, help='lag for ACF and AMD')
+    parser.add_argument('--freq-0', type=int, default=0, help='lower band frequency for spectral descriptors')
+    parser.add_argument('--freq-1', type=int, default=2000, help='upper band frequency for spectral descriptors')
+    parser.add_argument('--window', choices=list(WINDOWS.keys()), default='none', help='window applied to frames')
+    parser.add_argument('--channels', choices=CHANNEL_MODES, default='mid',
+                        help='multichannel files: mid (mean) channel, max over channels or separate channels')
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help='compute precision, native computes STE, volume and ZCR on integer samples')
+    parser.add_argument('--decimate-pitch', action='store_true',
+                        help='compute f0 and voicing from a decimated copy of the signal (faster)')
+    parser.add_argument('--labels', action='store_true', help='also write silence/speech/music label files')
+    parser.add_argument('--cache', action='store_true', help='reuse features stored in the feature cache')
+    parser.add_argument('--cache-dir', help='feature cache directory (default: $SOUND_CACHE_DIR or '
+                                            '~/.cache/sound-processing), implies --cache')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+    parser.add_argument('--frame-jobs', type=int, default=1,
+                        help='split frames of each file between this many processes (for a few long files), '
+                             'files are then processed one after another')
+    parser.add_argument('--no-resume', action='store_true', help='process all files even if already done')
+    args = parser.parse_args(argv)
+    if args.frame_len < args.frame_hop:
+        parser.error('frame step can\'t be larger than frame length')
+    if not args.inputs and not args.file_list:
+        parser.error('no input files given')
+    return args
+
+
+def collect_files(inputs, file_list=None):
+    """
+    Expand input paths into a sorted list of WAV files.
+
+    Args:
+        inputs (list) : WAV files and directories
+        file_list (str) : optional text file with one path per line
+
+    Returns:
+        List of WAV file paths
+    """
+    paths = list(inputs)
+    if file_list:
+        with open(file_list) as f:
+            paths += [line.strip() for line in f if line.strip()]
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, name) for name in names if name.lower().endswith('.wav')]
+        else:
+            files.append(path)
+    return sorted(set(os.path.abspath(f) for f in files))
+
+
+def output_path(filename, base_dir, output_dir, fmt):
+    relative = os.path.relpath(filename, base_dir)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + '.' + fmt)
+
+
+def write_tracks(path, tracks, summary, fmt):
+    """
+    Atomically write per-frame feature tracks, so an interrupted run never leaves a partial file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if fmt == 'npz':
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **tracks, **{'summary_' + k: v for k, v in summary.items()})
+    else:
+        # per-channel tracks (channels x frames) are written as one column per channel
+        names, columns = [], []
+        for name, track in tracks.items():
+            if track.ndim == 1:
+                names.append(name)
+                columns.append(track)
+            else:
+                names += [f'{name}_{channel}' for channel in range(len(track))]
+                columns += list(track)
+        np.savetxt(tmp_path, np.column_stack(columns), delimiter=',', header=','.join(names), comments='',
+                   fmt='%.9g')
+    os.replace(tmp_path, path)
+
+
+def cached_features(filename, params, executor=None):
+    """
+    Compute features of a file, or load them from the feature cache if params['cache'] is set.
+    Frames are split between processes of executor if given.
+
+    Returns:
+        tracks dict, summary dict (see extract_features)
+    """
+    def compute():
+        store = SignalStore(filename)
+        return extract_features(store.samples(), store.fs, scale=store.scale,
+                                precision=params['precision'], win_fun=WINDOWS[params['window']],
+                                frame_len=params['frame_len'], frame_hop=params['frame_hop'],
+                                lag=params['lag'], freq_0=params['freq_0'], freq_1=params['freq_1'],
+                                channels=params['channels'], executor=executor,
+                                decimate_pitch=params['decimate_pitch'])
+
+    if not params['cache']:
+        return compute()
+    cache = DiskFeatureCache(params['cache_dir'])
+    content_hash = cache.content_hash(filename)
+    key = ('extract_features',) + tuple(params[name] for name in CACHE_KEY_PARAMS)
+    entry = cache.get(content_hash, key)
+    if entry is not None:
+        tracks = {name: value for name, value in entry.items() if not name.startswith('summary_')}
+        summary = {name[len('summary_'):]: value.item() if value.ndim == 0 else value
+                   for name, value in entry.items() if name.startswith('summary_')}
+        return tracks, summary
+    tracks, summary = compute()
+    cache.put(content_hash, key, {**tracks, **{'summary_' + k: v for k, v in summary.items()}})
+    return tracks, summary
+
+
+def process_file(job, executor=None):
+    """
+    Worker entry point: compute features of a single file and write them.
+
+    Returns:
+        filename, summary dict (None on failure), error message, elapsed time
+    """
+    filename, path, params = job
+    start = time.perf_counter()
+    try:
+        tracks, summary = cached_features(filename, params, executor)
+        write_tracks(path, tracks, summary, params['format'])
+        if params['labels']:
+            silence, zcr = tracks['silence'], tracks['zcr']
+            if silence.ndim == 1:
+                label_files = [(os.path.splitext(path)[0] + '.txt', silence, zcr)]
+            else:
+                label_files = [(os.path.splitext(path)[0] + f'_{channel}.txt', silence[channel], zcr[channel])
+                               for channel in range(len(silence))]
+            # frames start every int(frame_hop / 1000 * fs) samples
+            fs = SignalStore(filename).fs
+            step = int(params['frame_hop'] / 1000 * fs) / fs
+            for label_path, silence, zcr in label_files:
+                write_label_file(label_path, audio_type_segments(silence, zcr, step))
+        # per-channel values are joined with spaces in the summary
+        summary = {name: ' '.join(f'{v:.9g}' for v in value) if np.ndim(value) else value
+                   for name, value in summary.items()}
+        return filename, summary, None, time.perf_counter() - start
+    except Exception as e:
+        return filename, None, f'{type(e).__name__}: {e}', time.perf_counter() - start
+
+
+def load_done(summary_path):
+    """
+    Read files already listed in the summary. Rows cut short by a crash are ignored.
+    """
+    if not os.path.exists(summary_path):
+        return set()
+    with open(summary_path, newline='') as f:
+        return {row['file'] for row in csv.DictReader(f) if None not in row.values()}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_files(args.inputs, args.file_list)
+    if not files:
+        print('No WAV files found', file=sys.stderr)
+        return 1
+    base_dir = os.path.commonpath([os.path.dirname(f) for f in files])
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary_path = os.path.join(args.output_dir, SUMMARY_FILE)
+    if args.no_resume and os.path.exists(summary_path):
+        os.remove(summary_path)
+
+    params = {'frame_len': args.frame_len, 'frame_hop': args.frame_hop, 'lag': args.lag,
+              'freq_0': args.freq_0, 'freq_1': args.freq_1, 'window': args.window, 'format': args.format,
+              'labels': args.labels, 'channels': args.channels, 'precision': args.precision,
+              'decimate_pitch': args.decimate_pitch, 'cache': args.cache or args.cache_dir is not None,
+              'cache_dir': args.cache_dir}
+    done = load_done(summary_path)
+    jobs = []
+    for filename in files:
+        path = output_path(filename, base_dir, args.output_dir, args.format)
+        if filename in done and os.path.exists(path):
+            continue
+        jobs.append((filename, path, params))
+    print(f'{len(files)} files, {len(files) - len(jobs)} already done, {len(jobs)} to process', file=sys.stderr)
+
+    failed = 0
+    start = time.perf_counter()
+    new_summary = not os.path.exists(summary_path) or os.path.getsize(summary_path) == 0
+    # either files or frames of each file are processed in parallel
+    workers = ParallelFrameExecutor(args.frame_jobs) if args.frame_jobs > 1 else multiprocessing.Pool(args.jobs)
+    with open(summary_path, 'a', newline='') as summary_file, workers:
+        writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDS)
+        if new_summary:
+            writer.writeheader()
+        if args.frame_jobs > 1:
+            results = (process_file(job, workers) for job in jobs)
+        else:
+            results = workers.imap_unordered(process_file, jobs)
+        for i, (filename, summary, error, elapsed) in enumerate(results, 1):
+            if error is None:
+                writer.writerow({'file': filename, **summary})
+                summary_file.flush()
+            else:
+                failed += 1
+            total = time.perf_counter() - start
+            eta = total / i * (len(jobs) - i)
+            status = 'ok' if error is None else f'FAILED ({error})'
+            print(f'[{i}/{len(jobs)}] {filename} {status} {elapsed:.1f}s, eta {eta:.0f}s', file=sys.stderr)
+
+    print(f'Finished in {time.perf_counter() - start:.1f}s, {failed} failed', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""
+Benchmarks of core/functions.py on synthetic signals, runnable without a display.
+
+    python -m benchmarks.bench_functions --quick -o results.json
+    python -m benchmarks.bench_functions --quick --baseline results.json --threshold 0.2
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from core.features import (PITCH_DECIMATION_TOLERANCE, PRECISION_TOLERANCES, REGISTRY, compute_features,
+                           extract_features, pitch_error, track_errors)
+from core.functions import *
+from core.parallel import ParallelFrameExecutor
+from tests.signals import quantized, synthetic_signal
+
+CHUNK_SIZE = 4096
+
+QUICK_GRID = {'durations': [1, 10, 60], 'sample_rates': [16000, 44100], 'frame_lens': [25], 'frame_hops': [10],
+              'channels': [1]}
+FULL_GRID = {'durations': [1, 60, 600, 3600], 'sample_rates': [16000, 44100, 48000], 'frame_lens': [25, 50],
+             'frame_hops': [10, 25], 'channels': [1, 8]}
+
+
+def _extract_features_int16(signal, fs, precision, **kwargs):
+    raw, scale = quantized(signal)
+    return extract_features(raw, fs, precision=precision, scale=scale, **kwargs)
+
+
+_executor = []
+
+
+def executor():
+    """
+    Get process pool shared by the parallel benchmarks, started once so its startup isn't measured.
+    """
+    if not _executor:
+        _executor.append(ParallelFrameExecutor())
+        extract_features(np.zeros(16000), 16000, executor=_executor[0])
+    return _executor[0]
+
+
+def chunked(kernel):
+    def run(frames, fs):
+        for start in range(0, frames.shape[-2], CHUNK_SIZE):
+            kernel(frames[..., start:start + CHUNK_SIZE, :], fs)
+    return run
+
+
+def _pitch(frames, fs):
+    acf = autocorrelation_curve_frames(frames, pitch_lag_range(fs)[1])
+    fundamental_frequency_detection_frames(frames, fs, acf=acf)
+    unvoice_phones_detection_frames(frames, fs, acf=acf)
+
+
+def _spectral(frames, fs):
+    spectrum = FrameSpectrum(frames, fs)
+    effective_bandwidth_frames(spectrum, spectral_centroid=spectral_centroid_frames(spectrum))
+    band_features(spectrum, [(0, 2000)])
+
+
+ALL_FEATURES = tuple(name for name, feature in REGISTRY.items() if feature.label is not None)
+
+# name -> function(signal, frames, fs, frame_len, frame_hop)
+BENCHMARKS = {
+    'stride_trick': lambda sig, frames, fs, fl, fh: stride_trick(sig, int(fl / 1000 * fs), int(fh / 1000 * fs)),
+    'framing': lambda sig, frames, fs, fl, fh: framing(sig, fs, fl / 1000, fh / 1000),
+    'framing_stream': lambda sig, frames, fs, fl, fh: [None for _ in framing_stream(
+        signal_blocks(sig), fs, fl / 1000, fh / 1000, max_frames=CHUNK_SIZE)],
+    'short_time_energy': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: short_time_energy_frames(f))(frames, fs),
+    'zero_crossing_rate': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: zero_crossing_rate_frames(f))(frames, fs),
+    'detect_silence': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: detect_silence_frames(f, vol_max=10e-3))(frames, fs),
+    'autocorrelation_function': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: autocorrelation_function_frames(f, 10))(frames, fs),
+    'average_magnitude_difference': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: average_magnitude_difference_frames(f, 10))(frames, fs),
+    'pitch': lambda sig, frames, fs, fl, fh: chunked(_pitch)(frames, fs),
+    'yin_pitch': lambda sig, frames, fs, fl, fh: chunked(yin_pitch_frames)(frames, fs),
+    'amd_curve': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: average_magnitude_difference_curve_frames(f, pitch_lag_range(fs)[1]))(frames, fs),
+    'amdf_pitch': lambda sig, frames, fs, fl, fh: chunked(amdf_pitch_frames)(frames, fs),
+    'spectral': lambda sig, frames, fs, fl, fh: chunked(_spectral)(frames, fs),
+    'all_features': lambda sig, frames, fs, fl, fh: chunked(
+        lambda f, fs: compute_features(f, ALL_FEATURES, fs, channels='channels'))(frames, fs),
+    'spectrogram': lambda sig, frames, fs, fl, fh: spectrogram(mix_channels(sig, 'mid'), fs, fl / 1000, fh / 1000,
+                                                                win_fun=hann_window),
+    'extract_features': lambda sig, frames, fs, fl, fh: extract_features(sig, fs, frame_len=fl, frame_hop=fh,
+                                                                         channels='channels'),
+    'extract_features_decimated': lambda sig, frames, fs, fl, fh: extract_features(
+        sig, fs, frame_len=fl, frame_hop=fh, channels='channels', decimate_pitch=True),
+    'extract_features_parallel': lambda sig, frames, fs, fl, fh: extract_features(
+        sig, fs, frame_len=fl, frame_hop=fh, channels='channels', executor=executor()),
+    'extract_features_float32': lambda sig, frames, fs, fl, fh: _extract_features_int16(
+        sig, fs, 'float32', frame_len=fl, frame_hop=fh, channels='channels'),
+    'extract_features_native': lambda sig, frames, fs, fl, fh: _extract_features_int16(
+        sig, fs, 'native', frame_len=fl, frame_hop=fh, channels='channels'),
+}
+
+
+def measure(fn, repeat):
+    """
+    Run fn repeat times and measure the best time, then once more under tracemalloc for peak memory.
+
+    Returns:
+        best time in sec, peak memory in MB
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2 ** 20
+
+
+def run_benchmarks(grid, names, repeat, log=sys.stderr):
+    results = []
+    for duration, fs, channels in itertools.product(grid['durations'], grid['sample_rates'], grid['channels']):
+        signal = synthetic_signal(duration, fs, channels)
+        for frame_len, frame_hop in itertools.product(grid['frame_lens'], grid['frame_hops']):
+            if frame_len < frame_hop:
+                continue
+            frames, _ = framing(signal, fs, frame_len / 1000, frame_hop / 1000)
+            # frames of all channels are counted
+            n_frames = frames.shape[-2] * channels
+            for name in names:
+                seconds, peak_mb = measure(
+                    lambda: BENCHMARKS[name](signal, frames, fs, frame_len, frame_hop), repeat)
+                result = {'function': name, 'duration': duration, 'fs': fs, 'frame_len': frame_len,
+                          'frame_hop': frame_hop, 'channels': channels, 'n_frames': n_frames, 'seconds': seconds,
+                          'frames_per_s': n_frames / seconds if seconds else float('inf'),
+                          'realtime_factor': duration / seconds if seconds else float('inf'),
+                          'peak_mb': peak_mb}
+                results.append(result)
+                print(f'{name:30s} {duration:>6}s {fs:>6}Hz {channels:>2}ch {frame_len:>3}/{frame_hop:<3}ms '
+                      f'{seconds * 1000:10.2f}ms {result["realtime_factor"]:12.1f}x rt {peak_mb:9.1f}MB', file=log)
+    return results
+
+
+def check_accuracy(grid, log=sys.stderr):
+    """
+    Compare tracks of float32 and native precision with float64 tracks of int16 signals,
+    with and without window, and f0 of decimate_pitch with full rate f0.
+
+    Returns:
+        list of results, list of tolerance violations
+    """
+    results, violations = [], []
+    for duration, fs in itertools.product(grid['durations'], grid['sample_rates']):
+        signal = synthetic_signal(duration, fs)
+        for frame_len, frame_hop in itertools.product(grid['frame_lens'], grid['frame_hops']):
+            if frame_len < frame_hop:
+                continue
+            for window in (None, hann_window):
+                kwargs = {'frame_len': frame_len, 'frame_hop': frame_hop, 'win_fun': window}
+                reference, _ = _extract_features_int16(signal, fs, 'float64', **kwargs)
+                for precision in PRECISIONS[1:]:
+                    tracks, _ = _extract_features_int16(signal, fs, precision, **kwargs)
+                    errors = track_errors(tracks, reference)
+                    name = f'{precision} {duration}s {fs}Hz {frame_len}/{frame_hop}ms ' \
+                           f'{"hann" if window else "no window"}'
+                    results.append({'precision': precision, 'duration': duration, 'fs': fs, 'frame_len': frame_len,
+                                    'frame_hop': frame_hop, 'window': window is not None, 'errors': errors})
+                    for track, error in errors.items():
+                        if error > PRECISION_TOLERANCES['frames']:
+                            violations.append(f'{name}: {track} differs in {error:.2%} of frames')
+                    worst = max(errors, key=errors.get)
+                    print(f'{name:45s} worst {worst}, {errors[worst]:.2%} of frames differ', file=log)
+            kwargs = {'frame_len': frame_len, 'frame_hop': frame_hop}
+            reference, _ = extract_features(signal, fs, **kwargs)
+            tracks, _ = extract_features(signal, fs, decimate_pitch=True, **kwargs)
+            error = pitch_error(tracks['f0'], reference['f0'], reference['voicing'], fs)
+            name = f'decimated {duration}s {fs}Hz {frame_len}/{frame_hop}ms'
+            results.append({'precision': 'decimated', 'duration': duration, 'fs': fs, 'frame_len': frame_len,
+                            'frame_hop': frame_hop, 'window': False, 'errors': {'f0': error}})
+            if error > PITCH_DECIMATION_TOLERANCE:
+                violations.append(f'{name}: f0 differs by {error:.2%}')
+            print(f'{name:45s} f0 differs by at most {error:.2%}', file=log)
+    return results, violations
+
+
+def result_key(result):
+    return (result['function'], result['duration'], result['fs'], result['frame_len'], result['frame_hop'],
+            result.get('channels', 1))
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """
+    Compare results with baseline results.
+
+    Args:
+        results (list) : current results
+        baseline (list) : results of a previous run
+        threshold (float) : allowed relative slowdown (0.2 means 20% slower)
+        memory_threshold (float) : allowed relative growth of peak memory
+
+    Returns:
+        List of regression descriptions
+    """
+    baseline = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        name = '{} {}s {}Hz {}/{}ms {}ch'.format(*result_key(result))
+        if result['seconds'] > old['seconds'] * (1 + threshold):
+            regressions.append(f'{name}: time {old["seconds"]:.4f}s -> {result["seconds"]:.4f}s')
+        # ignore tiny allocations, their peak is dominated by noise
+        if result['peak_mb'] > max(old['peak_mb'] * (1 + memory_threshold), old['peak_mb'] + 1):
+            regressions.append(f'{name}: peak memory {old["peak_mb"]:.1f}MB -> {result["peak_mb"]:.1f}MB')
+    return regressions
+
+
+def parse_list(value, type_=float):
+    return [type_(v) for v in value.split(',')]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark core/functions.py on synthetic signals.')
+    parser.add_argument('--quick', action='store_true', help='small grid (default)')
+    parser.add_argument('--full', action='store_true', help='full grid from seconds to hours')
+    parser.add_argument('--durations', type=parse_list, help='comma separated signal durations (sec)')
+    parser.add_argument('--sample-rates', type=lambda v: parse_list(v, int), help='comma separated sample rates')
+    parser.add_argument('--frame-lens', type=lambda v: parse_list(v, int), help='comma separated frame lengths (ms)')
+    parser.add_argument('--frame-hops', type=lambda v: parse_list(v, int), help='comma separated frame steps (ms)')
+    parser.add_argument('--channels', type=lambda v: parse_list(v, int), help='comma separated numbers of channels')
+    parser.add_argument('--functions', type=lambda v: v.split(','), default=list(BENCHMARKS.keys()),
+                        help='comma separated benchmark names: ' + ','.join(BENCHMARKS.keys()))
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs, the best one is kept')
+    parser.add_argument('--accuracy', action='store_true',
+                        help='check float32 and native precision tracks against float64 and decimated pitch '
+                             'against full rate instead of timing')
+    parser.add_argument('-o', '--output', help='save results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown')
+    parser.add_argument('--memory-threshold', type=float, default=0.2, help='allowed relative peak memory growth')
+    args = parser.parse_args(argv)
+    unknown = set(args.functions) - set(BENCHMARKS.keys())
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(sorted(unknown))}')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = dict(FULL_GRID if args.full else QUICK_GRID)
+    for name in grid:
+        if getattr(args, name) is not None:
+            grid[name] = getattr(args, name)
+
+    if args.accuracy:
+        results, violations = check_accuracy(grid)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'grid': grid, 'tolerances': PRECISION_TOLERANCES,
+                           'pitch_decimation_tolerance': PITCH_DECIMATION_TOLERANCE, 'accuracy': results}, f, indent=2)
+        for violation in violations:
+            print(f'TOLERANCE {violation}', file=sys.stderr)
+        return 1 if violations else 0
+
+    results = run_benchmarks(grid, args.functions, args.repeat)
+    report = {
+        'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                 'numpy': np.__version__, 'machine': platform.machine(), 'platform': platform.platform()},
+        'grid': grid,
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+        print('No regressions', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Cold start times of the GUI and of processes using only the core package, each measured in a new interpreter.
+
+    python -m benchmarks.bench_startup --repeat 5 -o startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules the core package mustn't load at import time
+HEAVY_MODULES = ('scipy', 'matplotlib', 'PyQt5')
+
+_PRELUDE = """
+import json, sys, time
+start = time.perf_counter()
+def done(**times):
+    heavy = [name for name in {heavy} if name in sys.modules]
+    print(json.dumps({{'times': times, 'heavy_modules': heavy}}))
+""".format(heavy=HEAVY_MODULES)
+
+# name -> script printing times in sec since its start (see done in _PRELUDE)
+SCRIPTS = {
+    'interpreter': """
+done()
+""",
+    'core_import': """
+import core.features, core.parallel, core.signal_store, core.disk_cache, core.envelope
+done(import_s=time.perf_counter() - start)
+""",
+    # first map starts the pool, so workers import numpy and the core package
+    'worker_pool': """
+import numpy as np
+from core.functions import short_time_energy_frames
+from core.parallel import ParallelFrameExecutor
+imported = time.perf_counter()
+with ParallelFrameExecutor(2) as executor:
+    executor.map(short_time_energy_frames, np.zeros(16000), 16000)
+    done(import_s=imported - start, first_map_s=time.perf_counter() - imported)
+""",
+    'gui': """
+from PyQt5.QtWidgets import QApplication
+from gui.app import MainWindow
+imported = time.perf_counter()
+app = QApplication([])
+window = MainWindow()
+window.show()
+shown = time.perf_counter()
+while window.plot is None:
+    app.processEvents()
+done(import_s=imported - start, window_shown_s=shown - start, plot_ready_s=time.perf_counter() - start)
+""",
+}
+
+
+def run_script(name):
+    """
+    Run one startup script in a new interpreter.
+
+    Returns:
+        dict of times in sec (with the total process time under 'process_s'), list of loaded heavy modules
+    """
+    env = dict(os.environ)
+    if name == 'gui' and not env.get('DISPLAY') and not env.get('QT_QPA_PLATFORM'):
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', _PRELUDE + SCRIPTS[name]], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    process_s = time.perf_counter() - start
+    result = json.loads(output.strip().splitlines()[-1])
+    return {'process_s': process_s, **result['times']}, result['heavy_modules']
+
+
+def run_benchmarks(names, repeat, log=sys.stderr):
+    results = []
+    for name in names:
+        runs = [run_script(name) for _ in range(repeat)]
+        times = {key: statistics.median(times[key] for times, _ in runs) for key in runs[0][0]}
+        heavy = runs[0][1]
+        results.append({'script': name, 'repeat': repeat, **times, 'heavy_modules': heavy})
+        print(f'{name:12s} ' + ' '.join(f'{key}={value * 1000:.0f}ms' for key, value in times.items()) +
+              (f' loads {",".join(heavy)}' if heavy else ''), file=log)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold start of the GUI and of core imports.')
+    parser.add_argument('--scripts', type=lambda v: v.split(','), default=list(SCRIPTS.keys()),
+                        help='comma separated script names: ' + ','.join(SCRIPTS.keys()))
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs, the median is kept')
+    parser.add_argument('-o', '--output', help='save results as JSON')
+    args = parser.parse_args(argv)
+    unknown = set(args.scripts) - set(SCRIPTS.keys())
+    if unknown:
+        parser.error(f'unknown scripts: {", ".join(sorted(unknown))}')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmarks(args.scripts, args.repeat)
+    if args.output:
+        report = {
+            'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                     'machine': platform.machine(), 'platform': platform.platform()},
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    # only the GUI may load plotting, Qt and scipy
+    leaks = [result for result in results if result['script'] != 'gui' and result['heavy_modules']]
+    for result in leaks:
+        print(f'HEAVY IMPORT {result["script"]}: {", ".join(result["heavy_modules"])}', file=sys.stderr)
+    return 1 if leaks else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
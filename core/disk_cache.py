@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+
+def default_cache_dir():
+    return os.environ.get('SOUND_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'sound-processing')
+
+
+class DiskFeatureCache:
+    """
+    Persistent cache of computed arrays (feature tracks, segmentations) shared by all processes.
+
+    Entries are keyed by a content hash of the audio file and a tuple of parameters, so renamed
+    or copied files hit the same entries and edited files miss them. Every entry is written to
+    a temporary file and renamed into place, so readers never see partial entries. The least
+    recently used entries are removed when the directory grows over max_bytes. The directory
+    is scanned only when the size of the last scan plus the entries put since then exceed
+    max_bytes (or a tenth of it was put, to notice entries of other processes). Temporary files
+    left by writers killed during put are removed when the cache is opened or cleared, once
+    they are older than STALE_SECONDS (younger ones may still be written by other processes).
+
+    Args:
+        directory (str) : cache directory, see default_cache_dir
+        max_bytes (int) : size cap of all entries
+    """
+    HASHES_FILE = 'hashes.json'
+    STALE_SECONDS = 3600
+
+    def __init__(self, directory=None, max_bytes=2 * 2 ** 30):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._hashes = None
+        self._lock = threading.Lock()
+        # size of entries at the last scan (None before it) and of entries put since then
+        self._scanned_bytes = None
+        self._put_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        self._remove_stale()
+
+    def content_hash(self, filename, block_size=1 << 24):
+        """
+        Get hash of file content. Hashes are remembered by path, size and modification time,
+        so a file is read only the first time it's seen.
+
+        Returns:
+            Hex digest
+        """
+        stat = os.stat(filename)
+        file_key = f'{os.path.abspath(filename)}|{stat.st_size}|{stat.st_mtime_ns}'
+        with self._lock:
+            if self._hashes is None:
+                self._hashes = self._read_hashes()
+            digest = self._hashes.get(file_key)
+        if digest is not None:
+            return digest
+
+        content = hashlib.blake2b(digest_size=20)
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                content.update(block)
+        digest = content.hexdigest()
+        with self._lock:
+            # merge with hashes stored by other processes in the meantime
+            self._hashes = {**self._read_hashes(), **self._hashes, file_key: digest}
+            self._write_atomic(self.HASHES_FILE, lambda f: f.write(json.dumps(self._hashes).encode()))
+        return digest
+
+    def _read_hashes(self):
+        try:
+            with open(os.path.join(self.directory, self.HASHES_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _path(self, content_hash, key):
+        key_hash = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+        return os.path.join(self.directory, f'{content_hash}-{key_hash}.npz')
+
+    def _write_atomic(self, name, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, os.path.join(self.directory, name))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def get(self, content_hash, key):
+        """
+        Load entry stored under key for the file with given content hash and mark it as recently used.
+
+        Returns:
+            dict of arrays or None if there is no such entry
+        """
+        path = self._path(content_hash, key)
+        try:
+            with np.load(path) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            # missing, evicted by another process or unreadable
+            return None
+        return arrays
+
+    def put(self, content_hash, key, arrays):
+        """
+        Store dict of arrays under key for the file with given content hash.
+        """
+        path = self._path(content_hash, key)
+        self._write_atomic(os.path.basename(path), lambda f: np.savez(f, **arrays))
+        with self._lock:
+            self._put_bytes += os.path.getsize(path)
+            due = self._scanned_bytes is None or self._scanned_bytes + self._put_bytes > self.max_bytes \
+                or self._put_bytes > self.max_bytes / 10
+        if due:
+            self.evict()
+
+    def entries(self):
+        """
+        Returns:
+            List of (modification time, size, path) of all entries
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def _remove_stale(self):
+        # temporary files of _write_atomic whose writer didn't finish
+        deadline = time.time() - self.STALE_SECONDS
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.tmp'):
+                try:
+                    if entry.stat().st_mtime < deadline:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits max_bytes, and remembered hashes
+        of files which changed, were deleted or have no entries left.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        with self._lock:
+            self._scanned_bytes, self._put_bytes = total, 0
+        self._prune_hashes({os.path.basename(path).split('-')[0] for _, _, path in entries[removed:]})
+
+    def _prune_hashes(self, cached):
+        # keep hashes of unchanged files with entries in the cache
+        with self._lock:
+            hashes = {**self._read_hashes(), **(self._hashes or {})}
+            kept = {file_key: digest for file_key, digest in hashes.items()
+                    if digest in cached and _file_unchanged(file_key)}
+            self._hashes = kept
+            if kept != hashes:
+                self._write_atomic(self.HASHES_FILE, lambda f: f.write(json.dumps(kept).encode()))
+
+    def clear(self):
+        """
+        Remove all entries, remembered file hashes and stale temporary files.
+        """
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._remove_stale()
+        with self._lock:
+            self._hashes = {}
+            self._scanned_bytes, self._put_bytes = 0, 0
+            try:
+                os.remove(os.path.join(self.directory, self.HASHES_FILE))
+            except FileNotFoundError:
+                pass
+
+
+def _file_unchanged(file_key):
+    # file_key is 'path|size|mtime_ns' (see DiskFeatureCache.content_hash)
+    path, size, mtime_ns = file_key.rsplit('|', 2)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return (str(stat.st_size), str(stat.st_mtime_ns)) == (size, mtime_ns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or clear the feature cache.')
+    parser.add_argument('command', choices=['info', 'clear'])
+    parser.add_argument('--cache-dir', help='cache directory (default: $SOUND_CACHE_DIR or ~/.cache/sound-processing)')
+    args = parser.parse_args(argv)
+
+    cache = DiskFeatureCache(args.cache_dir)
+    if args.command == 'clear':
+        cache.clear()
+    print(f'{cache.directory}: {len(cache.entries())} entries, {cache.size() / 2 ** 20:.1f}MB')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import numpy as np
+
+from core.functions import mix_channels, signal_blocks
+
+
+class EnvelopePyramid:
+    """
+    Multi-resolution min/max envelope of a signal used to draw long signals with a number
+    of points matched to the view width instead of every sample.
+
+    Level k keeps the minimum and maximum of every base * factor ** k consecutive samples.
+    Views needing fewer samples per bin than the first level are drawn from the samples.
+    Multichannel signals are drawn as their mid (mean) channel.
+
+    Args:
+        data (array) : mono or multichannel signal (e.g. memory mapped samples)
+        fs (float) : number of samples per second
+        scale (float) : samples are divided by scale when drawn (see scale_data)
+        t0 (float) : time of the first sample in sec
+        base (int) : number of samples in a bin of the first level
+        factor (int) : reduction between consecutive levels
+        block_size (int) : number of samples read at once while building the first level
+    """
+
+    def __init__(self, data, fs, scale=1, t0=0, base=16, factor=4, block_size=1 << 22):
+        self.data = data
+        self.fs = fs
+        self.scale = scale
+        self.t0 = t0
+        self.levels = []
+
+        bin_size = base
+        block_size -= block_size % base
+        mins, maxs = [], []
+        for block in signal_blocks(data, block_size):
+            block = mix_channels(np.asarray(block, dtype=np.float32), 'mid')
+            block_mins, block_maxs = self._reduce(block / np.float32(scale), base)
+            mins.append(block_mins)
+            maxs.append(block_maxs)
+        if not mins:
+            return
+        mins, maxs = np.concatenate(mins), np.concatenate(maxs)
+        while True:
+            self.levels.append((bin_size, mins, maxs))
+            if len(mins) <= factor:
+                break
+            mins, _ = self._reduce(mins, factor)
+            _, maxs = self._reduce(maxs, factor)
+            bin_size *= factor
+
+    @staticmethod
+    def _reduce(values, size):
+        n_full = len(values) // size
+        full = values[:n_full * size].reshape(n_full, size)
+        mins, maxs = full.min(axis=1), full.max(axis=1)
+        if len(values) % size:
+            rest = values[n_full * size:]
+            mins = np.append(mins, rest.min())
+            maxs = np.append(maxs, rest.max())
+        return mins, maxs
+
+    @property
+    def duration(self):
+        return len(self.data) / self.fs
+
+    def view(self, x0, x1, width):
+        """
+        Get points to draw the signal between x0 and x1 sec on an axis width pixels wide.
+
+        Args:
+            x0 (float) : start of the view in sec
+            x1 (float) : end of the view in sec
+            width (int) : width of the view in pixels
+
+        Returns:
+            times, values (min and max of each bin interleaved, or samples at full resolution)
+        """
+        bin_size = max((x1 - x0) * self.fs, 1) / max(width, 1)
+        level = None
+        for candidate in self.levels:
+            if candidate[0] <= bin_size:
+                level = candidate
+
+        if level is None:
+            start = max(0, int((x0 - self.t0) * self.fs) - 1)
+            stop = min(len(self.data), max(start, int(np.ceil((x1 - self.t0) * self.fs)) + 1))
+            times = self.t0 + np.arange(start, stop) / self.fs
+            return times, mix_channels(np.asarray(self.data[start:stop]), 'mid') / self.scale
+
+        size, mins, maxs = level
+        start = max(0, int((x0 - self.t0) * self.fs / size) - 1)
+        stop = min(len(mins), max(start, int(np.ceil((x1 - self.t0) * self.fs / size)) + 1))
+        times = self.t0 + (np.arange(start, stop) + 0.5) * size / self.fs
+        return np.repeat(times, 2), np.column_stack((mins[start:stop], maxs[start:stop])).ravel()
+
+
+class SpectrogramPyramid:
+    """
+    Multi-resolution spectrogram image used to draw long spectrograms with a number of columns
+    matched to the view width. Level k keeps the maximum of every factor ** k consecutive frames,
+    so short peaks stay visible when zoomed out. Views are cut from the levels without
+    recomputing the STFT.
+
+    Args:
+        db (array) : magnitudes in dB (n_frames x n_bins, see spectrogram)
+        step (float) : time between frames in sec
+        freqs (array) : bin frequencies
+        t0 (float) : start time of the first frame in sec
+        factor (int) : reduction between consecutive levels
+    """
+
+    def __init__(self, db, step, freqs, t0=0, factor=4):
+        self.step = step
+        self.freqs = freqs
+        self.t0 = t0
+        self.levels = [(1, db)]
+        size = 1
+        while len(db) > factor:
+            n_full = len(db) // factor
+            reduced = db[:n_full * factor].reshape(n_full, factor, -1).max(axis=1)
+            if len(db) % factor:
+                reduced = np.concatenate((reduced, db[n_full * factor:].max(axis=0, keepdims=True)))
+            db = reduced
+            size *= factor
+            self.levels.append((size, db))
+
+    def view(self, x0, x1, width):
+        """
+        Get image of the spectrogram between x0 and x1 sec for an axis width pixels wide.
+
+        Returns:
+            image (n_bins x columns), extent (left, right, bottom, top) for imshow
+        """
+        frames_per_pixel = max((x1 - x0) / self.step, 1) / max(width, 1)
+        size, db = self.levels[0]
+        for candidate in self.levels:
+            if candidate[0] <= frames_per_pixel:
+                size, db = candidate
+
+        column = size * self.step
+        start = min(max(0, int((x0 - self.t0) / column) - 1), max(len(db) - 1, 0))
+        stop = min(len(db), max(start + 1, int(np.ceil((x1 - self.t0) / column)) + 1))
+        # the last column of a level may cover fewer frames
+        right = min(self.t0 + stop * column, self.t0 + len(self.levels[0][1]) * self.step)
+        extent = (self.t0 + start * column, right, self.freqs[0], self.freqs[-1])
+        return db[start:stop].T, extent
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+
+class FeatureTrackCache:
+    """
+    Least recently used cache of feature tracks computed for a whole file.
+
+    Args:
+        max_bytes (int) : memory cap for all stored tracks. The least recently used tracks
+                          are evicted when it's exceeded.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._tracks = OrderedDict()
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, key):
+        return key in self._tracks
+
+    def get(self, key):
+        """
+        Get track stored under key and mark it as recently used.
+
+        Returns:
+            Track or None if it's not cached
+        """
+        track = self._tracks.get(key)
+        if track is not None:
+            self._tracks.move_to_end(key)
+        return track
+
+    def put(self, key, track):
+        """
+        Store track under key, evicting least recently used tracks over the memory cap.
+        """
+        if key in self._tracks:
+            self.nbytes -= self._tracks.pop(key).nbytes
+        self._tracks[key] = track
+        self.nbytes += track.nbytes
+        while self.nbytes > self.max_bytes and len(self._tracks) > 1:
+            _, evicted = self._tracks.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def invalidate(self, predicate=None):
+        """
+        Remove tracks whose key matches predicate, or all tracks if predicate is None.
+        """
+        for key in [key for key in self._tracks if predicate is None or predicate(key)]:
+            self.nbytes -= self._tracks.pop(key).nbytes
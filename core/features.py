@@ -0,0 +1,454 @@
+import contextlib
+import functools
+
+import numpy as np
+
+from core.functions import *
+
+
+class Feature:
+    """
+    Entry of the feature registry: a per-frame feature or an intermediate shared by features
+    (e.g. spectra), computed by func from other entries and parameters passed by name.
+
+    Args:
+        name (str) : registry name, also the name of the track in extract_features
+        func (function) : called with inputs, optional inputs and params as keyword arguments
+        inputs (tuple) : required entries, 'frames' are the (windowed) frames
+        params (tuple) : used parameters (fs and the ones in DEFAULT_PARAMS)
+        optional (tuple) : entries passed only if the plan computes them for another feature
+        label (str) : name shown in the GUI, None for intermediates
+        channel_max (function) : reduction of per-channel values over channels (axis 0) in 'max' mode
+    """
+
+    def __init__(self, name, func, inputs=('frames',), params=(), optional=(), label=None, channel_max=np.max):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.params = params
+        self.optional = optional
+        self.label = label
+        self.channel_max = channel_max
+
+
+REGISTRY = {}
+
+# decimation, low_signal, first_frame and frame_step locate frames in the decimated signal (see low_frames)
+DEFAULT_PARAMS = {'lag': 10, 'freq_0': 0, 'freq_1': 2000, 'vol_max': 10e-3, 'win_fun': None, 'decimation': 1,
+                  'low_signal': None, 'first_frame': 0, 'frame_step': None}
+
+
+def register(name, func, **kwargs):
+    """
+    Add entry to the registry (see Feature). Entries can only use entries registered before them.
+    """
+    REGISTRY[name] = Feature(name, func, **kwargs)
+
+
+def _low_frames(frames, win_fun, decimation, low_signal, first_frame, frame_step):
+    # frames of the signal decimated by decimation for pitch features, the frames themselves without decimation
+    if decimation == 1:
+        return frames
+    low = decimated_frames(low_signal, decimation, first_frame, frames.shape[-2], frames.shape[-1], frame_step)
+    return apply_window(low, win_fun) if win_fun is not None else low
+
+
+# intermediates
+register('signs', lambda frames: np.sign(frames))
+register('low_frames', _low_frames, params=('win_fun', 'decimation', 'low_signal', 'first_frame', 'frame_step'))
+# YIN uses one lag past the pitch range for interpolation, ACF of the lag is shared without decimation
+register('acf_curve', lambda low_frames, fs, lag, decimation: autocorrelation_curve_frames(
+    low_frames, max(pitch_lag_range(fs / decimation)[1] + 1, lag + 1 if decimation == 1 else 0)),
+    inputs=('low_frames',), params=('fs', 'lag', 'decimation'))
+register('amd_curve', lambda low_frames, fs, decimation: average_magnitude_difference_curve_frames(
+    low_frames, pitch_lag_range(fs / decimation)[1] + 1), inputs=('low_frames',), params=('fs', 'decimation'))
+# pitch, confidence and voiced flags of the YIN and AMDF trackers
+register('yin', lambda low_frames, acf_curve, fs, decimation: yin_pitch_frames(low_frames, fs / decimation,
+                                                                               acf=acf_curve),
+         inputs=('low_frames', 'acf_curve'), params=('fs', 'decimation'))
+register('amdf', lambda low_frames, amd_curve, fs, decimation: amdf_pitch_frames(low_frames, fs / decimation,
+                                                                                 amd=amd_curve),
+         inputs=('low_frames', 'amd_curve'), params=('fs', 'decimation'))
+register('spectrum', FrameSpectrum, params=('fs',))
+
+# features
+register('ste', short_time_energy_frames, label='Short Time Energy')
+register('volume', lambda ste: np.sqrt(ste), inputs=('ste',))
+# a frame is silent only if all channels are
+register('silence', lambda volume, vol_max: volume <= vol_max, inputs=('volume',), params=('vol_max',),
+         channel_max=np.min)
+register('zcr', zero_crossing_rate_frames, inputs=('frames', 'signs'), label='Zero Crossing Rate')
+register('acf', lambda frames, lag, decimation, acf_curve=None: autocorrelation_function_frames(
+    frames, lag, acf=acf_curve if decimation == 1 else None),
+    params=('lag', 'decimation'), optional=('acf_curve',), label='Autocorrelation Function')
+register('amd', average_magnitude_difference_frames, inputs=('frames', 'signs'), params=('lag',),
+         label='Average Magnitude Difference')
+# pitch features work on decimated frames if the caller gives a decimated signal
+register('f0', lambda low_frames, acf_curve, fs, decimation: fundamental_frequency_detection_frames(
+    low_frames, fs / decimation, acf=acf_curve, interpolate=decimation > 1),
+    inputs=('low_frames', 'acf_curve'), params=('fs', 'decimation'), label='Fundamental Frequency Detection')
+register('voicing', lambda low_frames, acf_curve, fs, decimation: unvoice_phones_detection_frames(
+    low_frames, fs / decimation, acf=acf_curve),
+    inputs=('low_frames', 'acf_curve'), params=('fs', 'decimation'), label='Unvoice Phones Detection')
+# pitch of unvoiced frames is 0
+register('yin_f0', lambda yin: np.where(yin[2], yin[0], 0), inputs=('yin',), label='YIN Fundamental Frequency')
+register('yin_confidence', lambda yin: yin[1], inputs=('yin',), label='YIN Confidence')
+register('yin_voiced', lambda yin: yin[2], inputs=('yin',), label='YIN Voiced Frames')
+register('amdf_f0', lambda amdf: np.where(amdf[2], amdf[0], 0), inputs=('amdf',), label='AMDF Fundamental Frequency')
+register('spectral_centroid', spectral_centroid_frames, inputs=('spectrum',), label='Spectral Centroid')
+register('effective_bandwidth', effective_bandwidth_frames, inputs=('spectrum', 'spectral_centroid'),
+         label='Effective Bandwidth')
+register('band_energy_ratio', band_energy_ratio_frames, inputs=('spectrum',), params=('freq_0', 'freq_1'),
+         label='Band Energy Ratio')
+register('spectral_flatness', spectral_flatness_measure_frames, inputs=('spectrum',), params=('freq_0', 'freq_1'),
+         label='Spectral Flatness Measure')
+register('spectral_crest_factor', spectral_crest_factor_frames, inputs=('spectrum',), params=('freq_0', 'freq_1'),
+         label='Spectral Crest Factor')
+
+
+def dependencies(name):
+    """
+    Get all entries needed to compute entry name (without optional ones).
+
+    Returns:
+        Set of entry names, including 'frames'
+    """
+    needed = set()
+    for entry in REGISTRY[name].inputs if name in REGISTRY else ():
+        needed |= {entry} | dependencies(entry)
+    return needed
+
+
+def related_features(name):
+    """
+    Get GUI features sharing an intermediate with feature name. Computing them together
+    costs little more than computing name alone.
+
+    Returns:
+        List of feature names (name included) in registry order
+    """
+    # low frames are the frames themselves or a cheap gather, they don't make computing features together pay off
+    shared = {entry for entry in dependencies(name) if entry in REGISTRY and REGISTRY[entry].label is None
+              and entry != 'low_frames'}
+    return [other for other, feature in REGISTRY.items() if feature.label is not None and
+            (other == name or shared & dependencies(other))]
+
+
+class FeaturePlan:
+    """
+    Order of computation of a set of features and all entries they need. Every entry is computed
+    once per run and released after its last use, so intermediates like ACF curves and spectra
+    are shared by all features using them. Optional inputs are passed to features if the
+    plan contains them anyway.
+
+    Args:
+        names (tuple) : requested features
+        given (tuple) : entries passed to run instead of being computed
+    """
+
+    def __init__(self, names, given=()):
+        self.names = tuple(names)
+        self.given = tuple(given)
+        needed = set(self.names)
+        for name in self.names:
+            needed |= dependencies(name)
+        needed -= {'frames', *self.given}
+
+        # registry order is a valid topological order
+        self.steps = [name for name in REGISTRY if name in needed]
+        self.arguments = {name: [entry for entry in REGISTRY[name].inputs] +
+                          [entry for entry in REGISTRY[name].optional if entry in needed or entry in self.given]
+                          for name in self.steps}
+        last_use = {}
+        for i, name in enumerate(self.steps):
+            for entry in self.arguments[name]:
+                last_use[entry] = i
+        self.releases = [[entry for entry, last in last_use.items() if last == i and entry not in self.names
+                          and entry != 'frames'] for i in range(len(self.steps))]
+
+    def run(self, frames, params, channels='mid', given=None, stage=None):
+        """
+        Compute the features for frames.
+
+        Args:
+            frames (array) : audio signal divided into frames (n_frames x frame_len, or channels x n_frames x frame_len)
+            params (dict) : parameters of entries (see DEFAULT_PARAMS, fs is required by some)
+            channels (str) : reduction of per-channel values of multichannel frames, one of CHANNEL_MODES
+            given (dict) : values of entries given at construction
+            stage (function) : context manager factory timing each step as 'feature:<name>' (e.g. profiler.stage)
+
+        Returns:
+            dict of per-frame values of requested features
+        """
+        stage = stage or (lambda name: _NULL_STAGE)
+        values = {'frames': frames, **(given or {})}
+        params = {**DEFAULT_PARAMS, **params}
+        for name, release in zip(self.steps, self.releases):
+            feature = REGISTRY[name]
+            kwargs = {entry: values[entry] for entry in self.arguments[name]}
+            kwargs.update({param: params[param] for param in feature.params})
+            with stage(f'feature:{name}'):
+                values[name] = feature.func(**kwargs)
+            for entry in release:
+                del values[entry]
+
+        result = {name: values[name] for name in self.names}
+        if frames.ndim == 3 and channels == 'max':
+            result = {name: REGISTRY[name].channel_max(value, axis=0) for name, value in result.items()}
+        return result
+
+
+@functools.lru_cache(maxsize=64)
+def plan_features(names, given=()):
+    """
+    Get FeaturePlan of names (tuple), plans are cached.
+    """
+    return FeaturePlan(names, given)
+
+
+def compute_features(frames, names, fs, channels='mid', win_fun=None, given=None, stage=None, **params):
+    """
+    Compute several features of frames in one pass sharing intermediates (see FeaturePlan).
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len, or channels x n_frames x frame_len)
+        names (iterable) : names of features in REGISTRY
+        fs (int) : signal frequency
+        channels (str) : reduction of per-channel values of multichannel frames, one of CHANNEL_MODES
+        win_fun (function) : window function applied to frames, no window if None
+        given (dict) : already computed entries of windowed frames (e.g. 'ste')
+        stage (function) : context manager factory timing each step by name (e.g. profiler.stage)
+        params : lag, freq_0, freq_1, vol_max and decimation of pitch features (see DEFAULT_PARAMS):
+                 decimation (int) : factor of low_signal, frames are used if 1
+                 low_signal (array) : signal decimated by decimation (see decimate)
+                 first_frame (int) : index of the first of frames in the signal
+                 frame_step (int) : frame step in samples of the signal
+
+    Returns:
+        dict of per-frame values of every feature
+    """
+    given = given or {}
+    if win_fun is not None:
+        with (stage or (lambda name: _NULL_STAGE))('windowing'):
+            frames = apply_window(frames, win_fun)
+    plan = plan_features(tuple(names), tuple(given))
+    return plan.run(frames, {'fs': fs, 'win_fun': win_fun, **params}, channels=channels, given=given, stage=stage)
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+EXTRACTED_FEATURES = ('ste', 'volume', 'zcr', 'silence', 'acf', 'amd', 'f0', 'voicing', 'spectral_centroid',
+                      'effective_bandwidth') + BAND_FEATURES
+
+# max relative difference of f0 of voiced frames computed with decimate_pitch from full rate f0 (see extract_features)
+PITCH_DECIMATION_TOLERANCE = 0.02
+
+# allowed differences of reduced precision tracks from float64 tracks (see extract_features):
+# at most 'frames' of frames may differ by more than 'relative' of the track range (or at all for
+# discrete tracks)
+PRECISION_TOLERANCES = {'relative': 1e-5, 'frames': 0.005}
+DISCRETE_TRACKS = ('silence', 'f0')
+
+
+def track_errors(tracks, reference, relative=PRECISION_TOLERANCES['relative']):
+    """
+    Compare feature tracks with reference tracks.
+
+    Returns:
+        dict of fractions of frames differing by more than relative of the reference range
+        (or at all for discrete tracks)
+    """
+    errors = {}
+    for name, expected in reference.items():
+        actual = tracks[name]
+        if not expected.size:
+            errors[name] = 0.
+        elif name in DISCRETE_TRACKS:
+            errors[name] = float(np.mean(actual != expected))
+        else:
+            actual, expected = actual.astype(np.float64), expected.astype(np.float64)
+            value_range = np.nanmax(np.abs(expected))
+            with np.errstate(invalid='ignore'):
+                different = ~(np.abs(actual - expected) <= relative * value_range)
+            # frames where both are nan (e.g. voicing of silent frames) are equal
+            errors[name] = float(np.mean(different & ~(np.isnan(actual) & np.isnan(expected))))
+    return errors
+
+
+def pitch_error(f0, reference, voicing, fs):
+    """
+    Get max relative difference of f0 from reference f0 of voiced frames (voicing > 0.45), except frames
+    where the reference is at a bound of the searched lags.
+    """
+    lag_min, lag_max = pitch_lag_range(fs)
+    with np.errstate(invalid='ignore'):
+        compared = (voicing > 0.45) & (reference < fs / lag_min) & (reference > fs / (lag_max - 1))
+    if not compared.any():
+        return 0.
+    return float(np.max(np.abs(f0[compared] / reference[compared] - 1)))
+
+
+# Feature extraction ---------------------------------------------------------------
+
+def extract_features(data, fs, frame_len=25, frame_hop=10, lag=10, freq_0=0, freq_1=2000, win_fun=None,
+                     chunk_size=4096, channels='mid', precision='float64', scale=1, executor=None,
+                     decimate_pitch=False):
+    """
+    Compute all per-frame feature tracks and per-file statistics of a signal without the GUI.
+    Frames are streamed in chunks (see framing_stream) so the padded signal copy,
+    ACF curves and spectra stay small for long signals. Statistics of the whole signal
+    are accumulated block by block (see signal_values), memory doesn't grow with the file
+    except for the tracks.
+
+    All channels of a multichannel signal are framed and processed in the same pass. With
+    channels='channels' every track and statistic has a leading channel axis, 'mid' processes
+    the mean of channels and 'max' takes the maximum of every value over channels (silence
+    is then detected on the maximal volume).
+
+    Raw samples (e.g. SignalStore.samples()) can be passed with their scale, they are then
+    converted block by block to the type selected by precision (see PRECISIONS). Compared to
+    float64, at most 0.5% of frames of float32 tracks differ by more than 1e-5 of the track
+    range (f0 and silence: differ at all). Such frames are ties of the pitch search and
+    spectral flatness of frames with an empty frequency bin, which float64 sees as rounding
+    noise. With native precision and no window STE, volume, ZCR and silence are computed
+    exactly from integer samples.
+
+    With an executor (see core.parallel.ParallelFrameExecutor) frames are split between its
+    processes, the results are identical.
+
+    With decimate_pitch, f0, voicing and their ACF curves are computed from a copy of the signal
+    decimated by decimation_factor (8 at 44.1 kHz), with the lag search range and frames that much
+    shorter. f0 of voiced frames (voicing > 0.45) differs from full rate by at most
+    PITCH_DECIMATION_TOLERANCE (1.3% measured on synthetic signals at 16 to 48 kHz, mostly
+    the integer lags of full rate), unless the full rate maximum is at a bound of the searched
+    range (pitch out of 50-400 Hz), where both are arbitrary. Voicing differs by about 0.01.
+    ACF and AMD of the lag parameter stay at full rate.
+
+    Args:
+        data (array) : mono (N) or multichannel (N x channels) signal scaled with scale_data or raw samples
+        fs (int) : signal frequency
+        frame_len (int) : frame length in ms
+        frame_hop (int) : frame step in ms
+        lag (int) : lag number for ACF and AMD
+        freq_0 (int) : lower band frequency for spectral descriptors
+        freq_1 (int) : upper band frequency for spectral descriptors
+        win_fun (function) : window function applied to frames, no window if None
+        chunk_size (int) : number of frames (of all channels) processed at once
+        channels (str) : handling of multichannel signals, one of CHANNEL_MODES
+        precision (str) : compute precision, one of PRECISIONS
+        scale (float) : data are divided by scale (see scale_data)
+        executor (ParallelFrameExecutor) : process pool for per-frame tracks, computed in this process if None
+        decimate_pitch (bool) : compute pitch features from a decimated copy of the signal
+
+    Returns:
+        dict of per-frame feature arrays (with frame start times under 'time'),
+        dict of per-file values
+    """
+    dtype = np.float64 if precision == 'float64' else np.float32
+    multichannel = np.ndim(data) == 2 and channels != 'mid'
+    # integer samples are framed directly unless channels have to be mixed first
+    native = precision == 'native' and np.issubdtype(data.dtype, np.integer) and (np.ndim(data) == 1 or multichannel)
+    reduce = (lambda values: reduce_channels(values, channels)) if multichannel else (lambda values: values)
+    chunk_size = max(chunk_size // data.shape[1], 1) if multichannel else chunk_size
+    options = {'fs': fs, 'lag': lag, 'freq_0': freq_0, 'freq_1': freq_1, 'win_fun': win_fun,
+               'channels': channels, 'native': native, 'dtype': dtype, 'scale': scale}
+
+    mix = functools.partial(mix_scaled, scale=scale, mode=channels, dtype=dtype)
+
+    shared = {}
+    if decimate_pitch and decimation_factor(fs) > 1:
+        options['decimation'] = decimation_factor(fs)
+        options['frame_step'] = int(frame_hop / 1000 * fs)
+        shared['low_signal'] = decimate(data, options['decimation'], convert=mix).astype(dtype)
+
+    # native frames are raw samples, converted in _frame_features
+    prepare = None if native else mix
+
+    def blocks():
+        for block in signal_blocks(data):
+            yield block if native else mix(block)
+
+    if executor is not None:
+        tracks = executor.map(_frame_features, data, fs, frame_len / 1000, frame_hop / 1000, convert=prepare,
+                              kwargs=options, shared=shared, index='first_frame', max_frames=chunk_size)
+        raw_ste = [tracks.pop('raw_ste')] if tracks else []
+    else:
+        chunks = []
+        first_frame = 0
+        for chunk in framing_stream(blocks(), fs, win_len=frame_len / 1000, win_hop=frame_hop / 1000,
+                                    max_frames=chunk_size):
+            chunks.append(_frame_features(chunk, first_frame=first_frame, **options, **shared))
+            first_frame += chunk.shape[-2]
+        raw_ste = [chunk.pop('raw_ste') for chunk in chunks]
+        tracks = {}
+        for name in (chunks[0] if chunks else {}):
+            tracks[name] = np.concatenate([chunk[name] for chunk in chunks], axis=-1)
+    n_frames = tracks['ste'].shape[-1] if 'ste' in tracks else 0
+    tracks = {'time': np.arange(n_frames) * int(frame_hop / 1000 * fs) / fs, **tracks}
+
+    zcr = np.concatenate([reduce(zero_crossing_rate_frames(chunk)) for chunk in framing_stream(
+        blocks(), fs, win_len=frame_len / 1000, win_hop=frame_len / 1000, max_frames=chunk_size)], axis=-1)
+    summary = {
+        'duration': len(data) / fs,
+        'lster': low_short_time_energy_ratio(None, ste=np.concatenate(raw_ste, axis=-1)),
+        'hzcrr': high_zero_crossing_rate_ratio(zcr, zcr.shape[-1]),
+        **signal_values(data, lag, channels, scale=scale),
+    }
+    return tracks, summary
+
+
+def _convert(block, dtype, scale):
+    if block.dtype == dtype and scale == 1:
+        return block
+    return np.divide(block, scale, dtype=dtype)
+
+
+def _frame_features(chunk, fs, lag, freq_0, freq_1, win_fun, channels, native, dtype, scale, **decimation):
+    # per-frame tracks of extract_features for a chunk of frames, a module level function
+    # so process pools can run it
+    frames = _convert(chunk, dtype, scale) if native else chunk
+    raw_ste = short_time_energy_frames(chunk) / scale ** 2 if native else short_time_energy_frames(frames)
+    # without window STE and signs (exact for integer samples) are shared with the tracks
+    given = {'ste': raw_ste, 'signs': np.sign(chunk)} if win_fun is None else {}
+    values = compute_features(frames, EXTRACTED_FEATURES, fs, channels=channels, win_fun=win_fun, given=given,
+                              lag=lag, freq_0=freq_0, freq_1=freq_1, **decimation)
+    values['raw_ste'] = reduce_channels(raw_ste, channels) if chunk.ndim == 3 else raw_ste
+    return values
+
+
+def signal_values(data, lag, channels='mid', scale=1, block_size=1 << 20):
+    """
+    Compute short time energy, zero crossing rate, ACF and AMD of a whole signal (or selection).
+    The signal is read in blocks with the last lag samples of the previous block carried over,
+    so only a block at a time is converted (e.g. of memory mapped files). Sums over whole
+    signals are long, so they are accumulated in float64.
+
+    Args:
+        data (array) : mono (N) or multichannel (N x channels) signal
+        lag (int) : lag number for ACF and AMD
+        channels (str) : handling of multichannel signals, one of CHANNEL_MODES
+        scale (float) : samples are divided by scale (see scale_data)
+        block_size (int) : number of samples read at once
+
+    Returns:
+        dict of values (arrays with one value per channel for channels='channels')
+    """
+    n = len(data)
+    sums = dict.fromkeys(('ste', 'zcr', 'acf', 'amd'), 0.)
+    # samples of previous blocks still needed: lag for ACF and AMD, one for ZCR
+    carry = mix_channels(np.divide(data[:0], scale, dtype=np.float64), channels)
+    for block in signal_blocks(data, block_size):
+        new = mix_channels(np.divide(block, scale, dtype=np.float64), channels)
+        x = np.concatenate((carry, new))
+        signs = np.sign(x)
+        t = len(carry)
+        sums['ste'] = sums['ste'] + np.einsum('i...,i...->...', new, new)
+        sums['zcr'] = sums['zcr'] + np.sum(np.abs(np.diff(signs[max(t - 1, 0):], axis=0)), axis=0)
+        # lagged pairs ending in this block
+        first = min(max(t, lag), len(x))
+        sums['acf'] = sums['acf'] + np.einsum('i...,i...->...', x[first:], x[first - lag:len(x) - lag])
+        sums['amd'] = sums['amd'] + np.sum(np.abs(signs[first:] - signs[first - lag:len(x) - lag]), axis=0)
+        carry = x[max(len(x) - max(lag, 1), 0):]
+    values = {'ste': sums['ste'] / max(n, 1), 'zcr': sums['zcr'] / (2 * max(n, 1)), 'acf': sums['acf'],
+              'amd': sums['amd']}
+    return {name: np.asarray(reduce_channels(value, channels))[()] for name, value in values.items()}
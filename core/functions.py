@@ -0,0 +1,1265 @@
+import functools
+
+import numpy as np
+
+
+def stride_trick(a, stride_length, stride_step):
+    """
+    apply framing using the stride trick from numpy.
+
+    Args:
+        a (array) : signal array, mono (N) or multichannel (N x channels).
+        stride_length (int) : length of the stride.
+        stride_step (int) : stride step.
+
+    Returns:
+        blocked/framed array (nrows x stride_length, or channels x nrows x stride_length).
+    """
+    nrows = ((len(a) - stride_length) // stride_step) + 1
+    n = a.strides[0]
+    return np.lib.stride_tricks.as_strided(a,
+                                           shape=a.shape[1:] + (nrows, stride_length),
+                                           strides=a.strides[1:] + (stride_step * n, n))
+
+
+def join_blocks(blocks, pad_length=0):
+    """
+    Concatenate signal blocks and append pad_length zeros. Multichannel signals (N x channels)
+    are stored channel by channel, so frames taken by stride_trick have contiguous samples.
+
+    Args:
+        blocks (list) : consecutive signal blocks
+        pad_length (int) : number of appended zeros
+
+    Returns:
+        Joined signal
+    """
+    length = sum(len(block) for block in blocks)
+    dtype = np.result_type(*blocks)
+    signal = np.zeros(blocks[0].shape[1:] + (length + pad_length,), dtype=dtype).T
+    start = 0
+    for block in blocks:
+        signal[start:start + len(block)] = block
+        start += len(block)
+    return signal
+
+
+def framing(sig, fs, win_len=0.025, win_hop=0.01):
+    """
+    transform a signal into a series of overlapping frames (=Frame blocking).
+
+    Args:
+        sig     (array) : a mono (N) or multichannel (N x channels) audio signal from which to compute features.
+        fs        (int) : the sampling frequency of the signal we are working with.
+                          Default is 16000.
+        win_len (float) : window length in sec.
+                          Default is 0.025.
+        win_hop (float) : step between successive windows in sec.
+                          Default is 0.01.
+
+    Returns:
+        array of frames (n_frames x frame_len, or channels x n_frames x frame_len).
+        frame length.
+
+    Notes:
+    ------
+        Uses the stride trick to accelerate the processing.
+    """
+    # run checks and assertions
+    if win_len < win_hop:
+        print("ParameterError: win_len must be larger than win_hop.")
+
+    # compute frame length and frame step (convert from seconds to samples)
+    frame_length = win_len * fs
+    frame_step = win_hop * fs
+    pad_length = padding_length(len(sig), frame_length, frame_step)
+    pad_signal = join_blocks([sig], pad_length)
+
+    # apply stride trick
+    frames = stride_trick(pad_signal, int(frame_length), int(frame_step))
+    return frames, frame_length
+
+
+def padding_length(signal_length, frame_length, frame_step):
+    """
+    compute number of zeros appended to the signal by framing.
+
+    Args:
+        signal_length (int) : number of samples in the signal.
+        frame_length (float) : frame length in samples.
+        frame_step (float) : frame step in samples.
+
+    Returns:
+        number of padding samples.
+    """
+    # compute number of frames and left sample in order to pad if needed to make
+    # sure all frames have equal number of samples  without truncating any samples
+    # from the original signal
+    frames_overlap = frame_length - frame_step
+    rest_samples = np.abs(signal_length - frames_overlap) % np.abs(frame_length - frames_overlap)
+    return int(frame_step - rest_samples) * int(rest_samples != 0.)
+
+
+def framing_stream(blocks, fs, win_len=0.025, win_hop=0.01, max_frames=4096):
+    """
+    transform a stream of signal blocks into blocks of overlapping frames.
+    Frames are identical to the ones returned by framing() for the concatenated signal,
+    but only one block and the overlap carried over from the previous block are kept in memory.
+
+    Args:
+        blocks (iterable) : mono (N) or multichannel (N x channels) audio signal blocks of any length.
+        fs          (int) : the sampling frequency of the signal we are working with.
+        win_len   (float) : window length in sec.
+                            Default is 0.025.
+        win_hop   (float) : step between successive windows in sec.
+                            Default is 0.01.
+        max_frames  (int) : maximal number of frames in a single yielded block.
+                            Default is 4096.
+
+    Yields:
+        arrays of at most max_frames frames.
+    """
+    if win_len < win_hop:
+        print("ParameterError: win_len must be larger than win_hop.")
+
+    frame_length = win_len * fs
+    frame_step = win_hop * fs
+    length, step = int(frame_length), int(frame_step)
+    signal_length = 0
+    carry = None
+
+    def split(buf):
+        if len(buf) < length:
+            return 0
+        frames = stride_trick(buf, length, step)
+        for start in range(0, frames.shape[-2], max_frames):
+            yield frames[..., start:start + max_frames, :]
+        return frames.shape[-2]
+
+    for block in blocks:
+        block = np.asarray(block)
+        signal_length += len(block)
+        if (carry is None or len(carry) == 0) and block.ndim == 1:
+            buf = block
+        else:
+            buf = join_blocks([block] if carry is None else [carry, block])
+        n_frames = yield from split(buf)
+        # keep samples not yet covered by a full frame (at most frame length)
+        carry = buf[n_frames * step:].copy()
+
+    if carry is None:
+        return
+    pad_length = padding_length(signal_length, frame_length, frame_step)
+    yield from split(join_blocks([carry], pad_length))
+
+
+def signal_blocks(data, block_size=1 << 20):
+    """
+    Split a signal into consecutive blocks without copying (e.g. to feed framing_stream).
+
+    Args:
+        data (array) : mono (N) or multichannel (N x channels) signal
+        block_size (int) : number of samples in a block
+
+    Yields:
+        views of consecutive signal blocks
+    """
+    for start in range(0, len(data), block_size):
+        yield data[start:start + block_size]
+
+
+def short_time_energy(data):
+    """
+    Compute short time energy parameter for single signal frame.
+
+    Args:
+        data (array) : single signal frame
+
+    Returns:
+        Short time energy
+    """
+    return (1 / len(data)) * (np.sum(np.power(data, 2)))
+
+
+def volume(data):
+    """
+    Compute volume parameter for single signal frame.
+
+    Args:
+        data (array) : single signal frame
+
+    Returns:
+        Volume
+    """
+    return np.sqrt(short_time_energy(data))
+
+
+def zero_crossing_rate(data):
+    """
+    Compute zero crossing rate (ZCR) parameter for single signal frame.
+
+    Args:
+        data (array) : single signal frame
+
+    Returns:
+        Zero crossing rate
+    """
+    n = len(data)
+    return (1 / (2 * n)) * (np.sum(np.abs(np.sign(data[1:n]) - np.sign(data[0:n - 1]))))
+
+
+def autocorrelation_function(data, lag):
+    """
+    Compute autocorrelation function for single signal frame.
+
+    Args:
+        data (array) : single signal frame
+        lag (int) : lag number
+
+    Returns:
+        Autocorrelation function
+    """
+    n = len(data)
+    return np.sum(np.multiply((data[lag:n]), (data[0:n - lag])))
+
+
+def average_magnitude_difference(data, lag):
+    """
+    Compute average magnitude difference parameter for single signal frame.
+
+    Args:
+        data (array) : single signal frame
+        lag (int) : lag number
+
+    Returns:
+        Average magnitude difference
+    """
+    n = len(data)
+    return np.sum(np.abs(np.sign(data[lag:n]) - np.sign(data[0:n - lag])))
+
+
+def scale_data(data):
+    """
+    Scale given signal data to range [-1,1] based on the biggest absolute value of signal.
+
+    Args:
+        data (array) : one dimensional signal
+
+    Returns:
+        Scaled siganl data
+    """
+    min_val = np.min(data)
+    max_val = np.max(data)
+    scale = max(abs(np.min(data)), abs(np.max(data)))
+    return np.divide(data, scale)
+
+
+def detect_silence(data, vol_max):
+    """
+    Detects silent for given signal data based on average abs value.
+
+    Args:
+        data (array) : one dimensional signal
+        vol_max (float) : max volume for silence
+
+    Returns:
+        Boolean which indicate whether silence was detected 
+    """
+    vol = volume(data)
+    if vol > vol_max:
+        return False
+    else:
+        return True
+
+
+def short_time_energy_frames(frames):
+    """
+    Compute short time energy parameter for every frame at once.
+    Integer frames (e.g. raw int16 samples) are accumulated exactly in int64 without
+    converting samples to float, the result is then in squared sample units.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+
+    Returns:
+        Array of short time energy values, one per frame
+    """
+    if np.issubdtype(frames.dtype, np.integer):
+        return np.einsum('...i,...i->...', frames, frames, dtype=np.int64) / frames.shape[-1]
+    return np.einsum('...i,...i->...', frames, frames) / frames.shape[-1]
+
+
+def volume_frames(frames):
+    """
+    Compute volume parameter for every frame at once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+
+    Returns:
+        Array of volume values, one per frame
+    """
+    return np.sqrt(short_time_energy_frames(frames))
+
+
+def zero_crossing_rate_frames(frames, signs=None):
+    """
+    Compute zero crossing rate (ZCR) parameter for every frame at once.
+    Signs don't depend on scale, so integer frames give the same result as scaled ones.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        signs (array) : np.sign(frames), computed if not given
+
+    Returns:
+        Array of zero crossing rate values, one per frame
+    """
+    n = frames.shape[-1]
+    if signs is None:
+        signs = np.sign(frames)
+    return np.sum(np.abs(np.diff(signs, axis=-1)), axis=-1) / (2 * n)
+
+
+def detect_silence_frames(frames, vol_max):
+    """
+    Detects silence for every frame at once based on volume.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        vol_max (float) : max volume for silence
+
+    Returns:
+        Boolean array which indicates whether silence was detected in each frame
+    """
+    return volume_frames(frames) <= vol_max
+
+
+def low_short_time_energy_ratio(frames, ste=None):
+    """
+    Calculate ratio of frames for which short_time_energy
+    is smaller than 50% of avegare value.
+
+    Args:
+        frames (array) : audio signal divided into frames
+        ste (array) : short time energy of frames. Computed if not given.
+
+    Returns:
+        Float describing Low Short Time Energy Ratio (array with one per channel for multichannel frames)
+    """
+    if ste is None:
+        ste = short_time_energy_frames(frames)
+    mean = np.mean(ste, axis=-1, keepdims=True)
+    return 1 / (2 * ste.shape[-1]) * np.sum(np.sign(0.5 * mean - ste) + 1, axis=-1)
+
+
+def high_zero_crossing_rate_ratio(zcr, data_len):
+    """
+    Calculate ratio of frames for which zero_crossing_rate
+    is greater than 150% of avegare value.
+
+    Args:
+        zcr (array) : array of caluculated zero_crossing_rate function
+        data_len (int) : number of samples in zcr array
+
+    Returns:
+        Float describing High Zero Crossing Rate Ratio (array with one per channel for multichannel tracks)
+    """
+    mean = np.mean(zcr, axis=-1, keepdims=True)
+    return 1 / (2 * data_len) * np.sum(np.sign(zcr - 1.5 * mean) + 1, axis=-1)
+
+
+def fundamental_frequency_detection(data, fs):
+    """
+    Calculate fundamental frequency which is between 50 and 400 Hz.
+
+    Args:
+        data (array) : one dimensional signal
+        fs (int) : signal frequency
+
+    Returns:
+        Fundamental frequency
+    """
+    f_min = 50
+    f_max = 400
+    lag_min = int(fs / f_max)
+    lag_max = int(fs / f_min)
+    index = np.argmax(np.array(
+        [autocorrelation_function(data, lag) for lag in range(lag_min, lag_max)]))
+    return fs / (lag_min + index)
+
+
+def fundamental_frequency_detection_2(data, fs):
+    """
+    Function used in unvoiced phones detection
+
+    Args:
+        data (array) : one dimensional signal
+        fs (int) : signal frequency
+
+    Returns:
+        Fundamental frequency
+    """
+    f_min = 50
+    f_max = 400
+    lag_min = int(fs / f_max)
+    lag_max = int(fs / f_min)
+    index = np.argmax(np.array(
+        [autocorrelation_function(data, lag) for lag in range(lag_min, lag_max)]))
+    return autocorrelation_function(data, index + lag_min)
+
+
+def unvoice_phones_detection(data, fs):
+    """
+    Calculate fraction of maximum value of autocorrelation_function
+    from function fundamental_frequency_detection_2 (R_max) and autocorrelation_function value
+    for lag = 0 (R(0)).
+
+    Args:
+        data (array) : one dimensional signal
+        fs (int) : signal frequency
+
+    Returns:
+        R_max/R(0)
+    """
+    acf_max = fundamental_frequency_detection_2(data, fs)
+    acf_0 = autocorrelation_function(data, lag=0)
+    return acf_max / acf_0
+
+
+def autocorrelation_curve_frames(frames, n_lags=None):
+    """
+    Compute autocorrelation function for all lags from 0 to n_lags - 1 for every frame at once.
+    Uses zero padded FFT so the result equals autocorrelation_function for each lag.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        n_lags (int) : number of lags to compute. Default is frame length.
+
+    Returns:
+        Array of autocorrelation curves (n_frames x n_lags)
+    """
+    n = frames.shape[-1]
+    if n_lags is None:
+        n_lags = n
+    n_valid = min(n_lags, n)
+    nfft = 1 << int(np.ceil(np.log2(max(n + n_valid - 1, 1))))
+    dtype = compute_dtype(frames)
+    fft = fft_module(frames)
+    spectrum = fft.rfft(frames, n=nfft, axis=-1)
+    acf = fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=nfft, axis=-1)[..., :n_valid].astype(dtype, copy=False)
+    if n_lags > n_valid:
+        # lags longer than the frame have no overlapping samples
+        acf = np.concatenate((acf, np.zeros(acf.shape[:-1] + (n_lags - n_valid,), dtype=dtype)), axis=-1)
+    return acf
+
+
+def autocorrelation_function_frames(frames, lag, acf=None):
+    """
+    Compute autocorrelation function for every frame at once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        lag (int) : lag number
+        acf (array) : autocorrelation curves from autocorrelation_curve_frames. Computed directly if not given.
+
+    Returns:
+        Array of autocorrelation function values, one per frame
+    """
+    if acf is not None and lag < acf.shape[-1]:
+        # a copy, so kept values don't keep the curves alive
+        return acf[..., lag].copy()
+    n = frames.shape[-1]
+    return np.einsum('...i,...i->...', frames[..., lag:n], frames[..., 0:n - lag])
+
+
+def average_magnitude_difference_frames(frames, lag, signs=None):
+    """
+    Compute average magnitude difference parameter for every frame at once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        lag (int) : lag number
+        signs (array) : np.sign(frames), computed if not given
+
+    Returns:
+        Array of average magnitude difference values, one per frame
+    """
+    n = frames.shape[-1]
+    if signs is None:
+        signs = np.sign(frames)
+    return np.sum(np.abs(signs[..., lag:n] - signs[..., 0:n - lag]), axis=-1)
+
+
+def pitch_lag_range(fs, f_min=50, f_max=400):
+    """
+    Compute range of lags searched by fundamental frequency detection.
+
+    Args:
+        fs (int) : signal frequency
+        f_min (float) : lowest detected frequency
+        f_max (float) : highest detected frequency
+
+    Returns:
+        lag_min, lag_max
+    """
+    return int(fs / f_max), int(fs / f_min)
+
+
+def fundamental_frequency_detection_frames(frames, fs, acf=None, interpolate=False):
+    """
+    Calculate fundamental frequency which is between 50 and 400 Hz for every frame at once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        fs (int) : signal frequency
+        acf (array) : autocorrelation curves from autocorrelation_curve_frames. Computed if not given.
+        interpolate (bool) : refine the lag of the ACF maximum with a parabola through its neighbours,
+                             which keeps decimated frames (see decimate) from rounding the pitch to few lags
+
+    Returns:
+        Array of fundamental frequencies, one per frame
+    """
+    lag_min, lag_max = pitch_lag_range(fs)
+    # interpolation reads the ACF one lag past the searched range
+    n_lags = lag_max + 1 if interpolate else lag_max
+    if acf is None or acf.shape[-1] < n_lags:
+        acf = autocorrelation_curve_frames(frames, n_lags)
+    lag = lag_min + np.argmax(acf[..., lag_min:lag_max], axis=-1)
+    if not interpolate:
+        return fs / lag
+    before, at, after = (np.take_along_axis(acf, (lag + shift)[..., None], axis=-1)[..., 0] for shift in (-1, 0, 1))
+    curvature = before - 2 * at + after
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(curvature < 0, 0.5 * (before - after) / curvature, 0)
+    return fs / (lag + np.clip(shift, -0.5, 0.5))
+
+
+def unvoice_phones_detection_frames(frames, fs, acf=None):
+    """
+    Calculate R_max/R(0) (see unvoice_phones_detection) for every frame at once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        fs (int) : signal frequency
+        acf (array) : autocorrelation curves from autocorrelation_curve_frames. Computed if not given.
+
+    Returns:
+        Array of R_max/R(0) values, one per frame
+    """
+    lag_min, lag_max = pitch_lag_range(fs)
+    if acf is None or acf.shape[-1] < lag_max:
+        acf = autocorrelation_curve_frames(frames, lag_max)
+    acf_max = np.max(acf[..., lag_min:lag_max], axis=-1)
+    return acf_max / acf[..., 0]
+
+
+def lagged_energies(frames, n_lags):
+    """
+    Energies of the overlapping parts of every frame and its copy shifted by each lag,
+    from prefix sums of squared samples.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        n_lags (int) : number of lags, at most frame length
+
+    Returns:
+        energies of samples [0, n - lag) and [lag, n), each (n_frames x n_lags)
+    """
+    n = frames.shape[-1]
+    squares = np.square(frames, dtype=compute_dtype(frames))
+    cumulative = np.concatenate((np.zeros(squares.shape[:-1] + (1,), dtype=squares.dtype),
+                                 np.cumsum(squares, axis=-1)), axis=-1)
+    lags = np.arange(n_lags)
+    return cumulative[..., n - lags], cumulative[..., n:] - cumulative[..., lags]
+
+
+def average_magnitude_difference_curve_frames(frames, n_lags=None):
+    """
+    Compute average_magnitude_difference_frames for all lags from 0 to n_lags - 1 at once.
+    For signs a, b in {-1, 0, 1} |a - b| = a^2 + b^2 - ab - a^2 b^2, so the sums come
+    from prefix sums and two FFT autocorrelation curves instead of a pass per lag.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        n_lags (int) : number of lags to compute, at most frame length. Default is frame length.
+
+    Returns:
+        Array of average magnitude difference curves (n_frames x n_lags)
+    """
+    n = frames.shape[-1]
+    n_lags = n if n_lags is None else min(n_lags, n)
+    signs = np.sign(frames)
+    head, tail = lagged_energies(signs, n_lags)
+    curves = head + tail - autocorrelation_curve_frames(signs, n_lags) \
+        - autocorrelation_curve_frames(np.square(signs), n_lags)
+    # sums of integers, rounding removes the FFT error
+    return np.rint(curves)
+
+
+def difference_function_frames(frames, n_lags=None, acf=None):
+    """
+    Compute the squared difference function d(lag) = sum (x[j] - x[j + lag])^2 for all lags
+    from 0 to n_lags - 1 of every frame, expanded into prefix energies and the autocorrelation curve.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        n_lags (int) : number of lags to compute, at most frame length. Default is frame length.
+        acf (array) : autocorrelation curves from autocorrelation_curve_frames. Computed if not given.
+
+    Returns:
+        Array of difference curves (n_frames x n_lags)
+    """
+    n = frames.shape[-1]
+    n_lags = n if n_lags is None else min(n_lags, n)
+    if acf is None or acf.shape[-1] < n_lags:
+        acf = autocorrelation_curve_frames(frames, n_lags)
+    head, tail = lagged_energies(frames, n_lags)
+    # rounding can make differences of near identical parts slightly negative
+    return np.maximum(head + tail - 2 * acf[..., :n_lags], 0)
+
+
+def cumulative_mean_normalized_difference(diff):
+    """
+    Divide the difference function by its mean over lags 1..lag (YIN), which removes the
+    dip at lag 0 and makes values comparable between frames. The value at lag 0 is 1.
+
+    Args:
+        diff (array) : difference curves (n_frames x n_lags)
+
+    Returns:
+        Array of normalized curves (n_frames x n_lags)
+    """
+    lags = np.arange(1, diff.shape[-1])
+    means = np.cumsum(diff[..., 1:], axis=-1) / lags
+    cmnd = np.ones_like(diff)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cmnd[..., 1:] = np.where(means > 0, diff[..., 1:] / means, 1)
+    return cmnd
+
+
+def normalized_difference_pitch(cmnd, fs, lag_min, threshold=0.1):
+    """
+    Pick the pitch lag of cumulative mean normalized difference curves in the YIN style: the first
+    local minimum from lag_min below threshold, or the global minimum if there is none, refined by
+    parabolic interpolation. The last lag of the curves is only used for interpolation.
+
+    Args:
+        cmnd (array) : normalized curves (n_frames x n_lags), see cumulative_mean_normalized_difference
+        fs (int) : signal frequency
+        lag_min (int) : first searched lag
+        threshold (float) : max normalized difference of voiced frames
+
+    Returns:
+        pitch in Hz, confidence (1 - normalized difference at the pitch lag), voiced flags;
+        pitch of unvoiced frames is the best estimate
+    """
+    n_lags = cmnd.shape[-1]
+    lag_min = min(lag_min, n_lags - 2)
+    search = cmnd[..., lag_min:n_lags - 1]
+    local_min = search <= cmnd[..., lag_min + 1:n_lags]
+    candidates = (search < threshold) & local_min
+    voiced = candidates.any(axis=-1)
+    index = np.where(voiced, np.argmax(candidates, axis=-1), np.argmin(search, axis=-1))
+    lag = lag_min + index
+
+    # parabola through the minimum and its neighbours
+    before = np.take_along_axis(cmnd, np.maximum(lag - 1, 0)[..., None], axis=-1)[..., 0]
+    at = np.take_along_axis(cmnd, lag[..., None], axis=-1)[..., 0]
+    after = np.take_along_axis(cmnd, (lag + 1)[..., None], axis=-1)[..., 0]
+    curvature = before - 2 * at + after
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(curvature > 0, 0.5 * (before - after) / curvature, 0)
+    pitch = fs / (lag + np.clip(shift, -0.5, 0.5))
+    confidence = np.clip(1 - at, 0, 1)
+    return pitch, confidence, voiced
+
+
+def yin_pitch_frames(frames, fs, threshold=0.1, f_min=50, f_max=400, acf=None):
+    """
+    Track pitch between f_min and f_max for every frame at once in the YIN style, from the cumulative
+    mean normalized squared difference function (see normalized_difference_pitch).
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        fs (int) : signal frequency
+        threshold (float) : max normalized difference of voiced frames
+        f_min (float) : lowest detected frequency
+        f_max (float) : highest detected frequency
+        acf (array) : autocorrelation curves from autocorrelation_curve_frames. Computed if not given.
+
+    Returns:
+        pitch in Hz, confidence (1 - normalized difference at the pitch lag), voiced flags;
+        pitch of unvoiced frames is the best estimate
+    """
+    lag_min, lag_max = pitch_lag_range(fs, f_min, f_max)
+    # one more lag for interpolation, lags must leave an overlap
+    n_lags = min(lag_max + 1, frames.shape[-1])
+    cmnd = cumulative_mean_normalized_difference(difference_function_frames(frames, n_lags, acf))
+    return normalized_difference_pitch(cmnd, fs, lag_min, threshold)
+
+
+def amdf_pitch_frames(frames, fs, threshold=0.1, f_min=50, f_max=400, amd=None):
+    """
+    Track pitch between f_min and f_max for every frame at once like yin_pitch_frames, from the
+    average magnitude difference curves (see average_magnitude_difference_curve_frames) instead of
+    the squared difference function. An estimate independent of the ACF to check f0 against.
+    Sums are divided by the number of compared pairs, which decreases with the lag.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        fs (int) : signal frequency
+        threshold (float) : max normalized difference of voiced frames
+        f_min (float) : lowest detected frequency
+        f_max (float) : highest detected frequency
+        amd (array) : curves from average_magnitude_difference_curve_frames. Computed if not given.
+
+    Returns:
+        pitch in Hz, confidence (1 - normalized difference at the pitch lag), voiced flags;
+        pitch of unvoiced frames is the best estimate
+    """
+    lag_min, lag_max = pitch_lag_range(fs, f_min, f_max)
+    n = frames.shape[-1]
+    n_lags = min(lag_max + 1, n)
+    if amd is None or amd.shape[-1] < n_lags:
+        amd = average_magnitude_difference_curve_frames(frames, n_lags)
+    curves = amd[..., :n_lags] / (n - np.arange(n_lags))
+    return normalized_difference_pitch(cumulative_mean_normalized_difference(curves), fs, lag_min, threshold)
+
+
+def yin_fundamental_frequency_frames(frames, fs, acf=None):
+    """
+    Calculate fundamental frequency with yin_pitch_frames for every frame at once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        fs (int) : signal frequency
+        acf (array) : autocorrelation curves from autocorrelation_curve_frames. Computed if not given.
+
+    Returns:
+        Array of fundamental frequencies, 0 for unvoiced frames
+    """
+    pitch, _, voiced = yin_pitch_frames(frames, fs, acf=acf)
+    return np.where(voiced, pitch, 0)
+
+
+# Functions for project no 2 ---------------------------------------------------------------
+
+def create_spectrum(data, fs, **kwargs):
+    magnitudes = np.abs(np.fft.rfft(data))
+    length = len(data)
+    freqs = np.abs(np.fft.fftfreq(length, 1.0 / fs)[:length // 2 + 1])
+
+    return magnitudes, freqs
+
+
+def spectral_centroid(data, fs, **kwargs):
+    magnitudes, freqs = create_spectrum(data, fs)
+
+    return np.sum(magnitudes * freqs) / np.sum(magnitudes)
+
+
+def effective_bandwidth(data, fs, **kwargs):
+    SC = kwargs.get("spectral_centroid", None)
+    if SC is None:
+        SC = spectral_centroid(data, fs)
+    magnitudes, freqs = create_spectrum(data, fs)
+
+    return np.sum(magnitudes ** 2 * (freqs - SC) ** 2) / np.sum(magnitudes ** 2)
+
+
+def help_fun_1(data, fs, **kwargs):
+    magnitudes, freqs = create_spectrum(data, fs)
+    freq_0_bin, freq_1_bin = band_bins(fs, len(data), kwargs.get("freq_0", 0), kwargs.get("freq_1", 2000))
+    power_magnitudes = magnitudes ** 2
+
+    return freq_0_bin, freq_1_bin, power_magnitudes
+
+
+def band_energy_ratio(data, fs, **kwargs):
+    freq_0_bin, freq_1_bin, power_magnitudes = help_fun_1(data, fs, **kwargs)
+    sum_power_in_range_frequencies = np.sum(power_magnitudes[freq_0_bin:freq_1_bin])
+    sum_power_out_range_frequencies = np.sum(power_magnitudes[:freq_0_bin]) + np.sum(power_magnitudes[freq_1_bin:])
+
+    return sum_power_in_range_frequencies / sum_power_out_range_frequencies
+
+
+def spectral_flatness_measure(data, fs, **kwargs):
+    freq_0_bin, freq_1_bin, power_magnitudes = help_fun_1(data, fs, **kwargs)
+    aritmetic_mean = np.mean(power_magnitudes[freq_0_bin:freq_1_bin])
+    if aritmetic_mean == 0:
+        return 1
+    # geometric mean in log domain, product of many bins underflows
+    with np.errstate(divide='ignore'):
+        geometric_mean = np.exp(np.mean(np.log(power_magnitudes[freq_0_bin:freq_1_bin])))
+    return geometric_mean / aritmetic_mean
+
+
+def spectral_crest_factor(data, fs, **kwargs):
+    freq_0_bin, freq_1_bin, power_magnitudes = help_fun_1(data, fs, **kwargs)
+    aritmetic_mean = np.mean(power_magnitudes[freq_0_bin:freq_1_bin])
+    return np.max(power_magnitudes) / aritmetic_mean
+
+
+class FrameSpectrum:
+    """
+    Magnitude and power spectra of all frames computed with a single batched rfft.
+    Shared by the *_frames spectral descriptors so the FFT is done only once.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len)
+        fs (int) : signal frequency
+    """
+
+    def __init__(self, frames, fs):
+        dtype = compute_dtype(frames)
+        self.fs = fs
+        self.nfft = frames.shape[-1]
+        self.magnitudes = np.abs(fft_module(frames).rfft(frames, axis=-1)).astype(dtype, copy=False)
+        self.power = self.magnitudes ** 2
+        self.freqs = np.fft.rfftfreq(self.nfft, 1.0 / fs).astype(dtype, copy=False)
+        self._log_power = None
+
+    @property
+    def log_power(self):
+        """
+        Natural logarithm of power spectra (-inf for empty bins), computed on first use.
+        Taken from magnitudes, whose squares can underflow in float32.
+        """
+        if self._log_power is None:
+            with np.errstate(divide='ignore'):
+                self._log_power = 2 * np.log(self.magnitudes)
+        return self._log_power
+
+    def band_bins(self, freq_0, freq_1):
+        """
+        Find bins closest to freq_0 and freq_1 (see band_bins).
+
+        Returns:
+            freq_0_bin, freq_1_bin (exclusive)
+        """
+        return band_bins(self.fs, self.nfft, freq_0, freq_1)
+
+
+@functools.lru_cache(maxsize=64)
+def band_bins(fs, nfft, freq_0, freq_1):
+    """
+    Find rfft bins closest to freq_0 and freq_1. Depends only on the parameters, so results are cached.
+
+    Args:
+        fs (int) : signal frequency
+        nfft (int) : number of samples in a frame
+        freq_0 (float) : lower band frequency
+        freq_1 (float) : upper band frequency
+
+    Returns:
+        freq_0_bin, freq_1_bin (exclusive)
+    """
+    freqs = np.fft.rfftfreq(nfft, 1.0 / fs)
+    freq_0_bin = int(np.argmin(np.abs(freqs - freq_0)))
+    freq_1_bin = int(np.argmin(np.abs(freqs - freq_1))) + 1
+    return freq_0_bin, freq_1_bin
+
+
+BAND_FEATURES = ('band_energy_ratio', 'spectral_flatness', 'spectral_crest_factor')
+
+
+def band_features(spectrum, bands, features=BAND_FEATURES):
+    """
+    Compute band energy ratio, spectral flatness measure and spectral crest factor
+    of several bands for all frames in one pass over the shared spectra.
+    Flatness uses the geometric mean computed in the log domain.
+
+    Args:
+        spectrum (FrameSpectrum) : spectra of frames
+        bands (list) : (freq_0, freq_1) tuples
+        features (tuple) : names of computed features, subset of BAND_FEATURES
+
+    Returns:
+        dict mapping every band to dict of feature arrays (one value per frame)
+    """
+    power = spectrum.power
+    peak = np.max(power, axis=-1) if 'spectral_crest_factor' in features else None
+    result = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for freq_0, freq_1 in bands:
+            freq_0_bin, freq_1_bin = spectrum.band_bins(freq_0, freq_1)
+            band_power = np.sum(power[..., freq_0_bin:freq_1_bin], axis=-1)
+            aritmetic_mean = band_power / (freq_1_bin - freq_0_bin)
+            values = {}
+            if 'band_energy_ratio' in features:
+                out_power = np.sum(power[..., :freq_0_bin], axis=-1) + np.sum(power[..., freq_1_bin:], axis=-1)
+                values['band_energy_ratio'] = band_power / out_power
+            if 'spectral_flatness' in features:
+                geometric_mean = np.exp(np.mean(spectrum.log_power[..., freq_0_bin:freq_1_bin], axis=-1))
+                values['spectral_flatness'] = np.where(aritmetic_mean == 0, 1, geometric_mean / aritmetic_mean)
+            if 'spectral_crest_factor' in features:
+                values['spectral_crest_factor'] = peak / aritmetic_mean
+            result[(freq_0, freq_1)] = values
+    return result
+
+
+def spectral_centroid_frames(spectrum, **kwargs):
+    magnitudes = spectrum.magnitudes
+    return np.sum(magnitudes * spectrum.freqs, axis=-1) / np.sum(magnitudes, axis=-1)
+
+
+def effective_bandwidth_frames(spectrum, **kwargs):
+    SC = kwargs.get("spectral_centroid", None)
+    if SC is None:
+        SC = spectral_centroid_frames(spectrum)
+    deviation = (spectrum.freqs - np.expand_dims(SC, -1)) ** 2
+    return np.sum(spectrum.power * deviation, axis=-1) / np.sum(spectrum.power, axis=-1)
+
+
+def _band_feature(spectrum, name, **kwargs):
+    band = (kwargs.get("freq_0", 0), kwargs.get("freq_1", 2000))
+    return band_features(spectrum, [band], features=(name,))[band][name]
+
+
+def band_energy_ratio_frames(spectrum, **kwargs):
+    return _band_feature(spectrum, 'band_energy_ratio', **kwargs)
+
+
+def spectral_flatness_measure_frames(spectrum, **kwargs):
+    return _band_feature(spectrum, 'spectral_flatness', **kwargs)
+
+
+def spectral_crest_factor_frames(spectrum, **kwargs):
+    return _band_feature(spectrum, 'spectral_crest_factor', **kwargs)
+
+
+def spectrogram(data, fs, win_len=0.025, win_hop=0.01, win_fun=None, floor_db=-120., max_frames=1024,
+                convert=None):
+    """
+    Short-time Fourier transform magnitudes in dB of frames taken by framing(). Frames are taken
+    from blocks of the signal by framing_stream and the windowed rfft is done for max_frames
+    frames at once, so only a block of the signal and that many complex spectra are kept
+    besides the result.
+
+    Args:
+        data (array) : mono audio signal scaled to [-1, 1], or raw samples converted by convert
+        fs (int) : signal frequency
+        win_len (float) : frame length in sec
+        win_hop (float) : frame step in sec
+        win_fun (function) : window function applied to frames, None for no window
+        floor_db (float) : lower bound of magnitudes in dB
+        max_frames (int) : number of frames transformed at once
+        convert (function) : applied to blocks of data (e.g. scaling and mixing memory mapped samples)
+
+    Returns:
+        magnitudes in dB (n_frames x n_bins, float32), frame start times, bin frequencies
+    """
+    convert = convert or (lambda block: block)
+    length, step = int(win_len * fs), int(win_hop * fs)
+    total = len(data) + padding_length(len(data), win_len * fs, win_hop * fs)
+    n_frames = max((total - length) // step + 1, 0)
+    db = np.empty((n_frames, length // 2 + 1), dtype=np.float32)
+    floor = 10 ** (floor_db / 20)
+    start = 0
+    blocks = (convert(block) for block in signal_blocks(data))
+    for chunk in framing_stream(blocks, fs, win_len, win_hop, max_frames=max_frames):
+        if win_fun is not None:
+            chunk = apply_window(chunk, win_fun)
+        magnitudes = np.abs(np.fft.rfft(chunk, axis=-1))
+        np.log10(np.maximum(magnitudes, floor), out=magnitudes)
+        np.multiply(magnitudes, 20, out=db[start:start + len(chunk)], casting='same_kind')
+        start += len(chunk)
+    times = np.arange(n_frames) * step / fs
+    return db, times, np.fft.rfftfreq(length, 1.0 / fs)
+
+
+# Window functions ---------------------------------------------------------------
+
+def rectangular_window(win_len):
+    return np.repeat(1, win_len)
+
+
+def bartlett_window(win_len):
+    i = np.arange(win_len)
+    return 1 - ((2 * np.abs(i - (win_len - 1) / 2)) / (win_len - 1))
+
+
+def hann_window(win_len):
+    i = np.arange(win_len)
+    return 0.5 * (1 - np.cos((2 * np.pi * i) / (win_len - 1)))
+
+
+def hamming_window(win_len):
+    i = np.arange(win_len)
+    return 0.54 - 0.46 * np.cos((2 * np.pi * i) / (win_len - 1))
+
+
+def blackman_window(win_len):
+    i = np.arange(win_len)
+    return 0.42 - 0.5 * np.cos((2 * np.pi * i) / (win_len - 1)) + 0.08 * np.cos((4 * np.pi * i) / (win_len - 1))
+
+
+@functools.lru_cache(maxsize=32)
+def window_table(win_fun, win_len, dtype=np.float64):
+    """
+    Get window coefficients of given length. Tables are cached per window function, length and type.
+
+    Args:
+        win_fun (function) : window function
+        win_len (int) : window length
+        dtype (type) : type of coefficients
+
+    Returns:
+        Read-only array of window coefficients
+    """
+    window = np.asarray(win_fun(win_len), dtype=dtype)
+    window.setflags(write=False)
+    return window
+
+
+def apply_window(frames, win_fun):
+    """
+    Multiply every frame by the window by broadcasting.
+
+    Args:
+        frames (array) : audio signal divided into frames (n_frames x frame_len) or single signal frame
+        win_fun (function) : window function
+
+    Returns:
+        Windowed frames
+    """
+    return frames * window_table(win_fun, frames.shape[-1], compute_dtype(frames))
+
+
+def use_window_function(data, win_fun):
+    return apply_window(data, win_fun)
+
+
+# Segmentation ---------------------------------------------------------------
+
+def flag_segments(flags):
+    """
+    Merge runs of consecutive frames with flag set into intervals.
+
+    Args:
+        flags (array) : boolean flag of every frame (e.g. from detect_silence_frames)
+
+    Returns:
+        Array (n_segments x 2) of [start, end) frame indices
+    """
+    padded = np.concatenate(([False], np.asarray(flags, dtype=bool), [False]))
+    return np.flatnonzero(padded[1:] != padded[:-1]).reshape(-1, 2)
+
+
+def label_segments(labels, frame_len, start=0):
+    """
+    Merge runs of consecutive frames with the same label into (start, end, label) intervals.
+
+    Args:
+        labels (array) : label of every frame
+        frame_len (float) : duration of a frame in sec
+        start (int) : index of the first frame
+
+    Returns:
+        List of (start, end, label) tuples with times in sec
+    """
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return []
+    boundaries = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(labels)]))
+    return [((start + s) * frame_len, (start + e) * frame_len, str(labels[s])) for s, e in zip(starts, ends)]
+
+
+def audio_type_segments(silence, zcr, frame_len, music_speech_boundary=0.15, start=0):
+    """
+    Split signal into silence, speech and music intervals. Frames which aren't silent are
+    speech if their zero crossing rate is above music_speech_boundary and music otherwise.
+
+    Args:
+        silence (array) : silence flag of every frame (see detect_silence_frames)
+        zcr (array) : zero crossing rate of every frame
+        frame_len (float) : duration of a frame in sec
+        music_speech_boundary (float) : zero crossing rate separating speech from music
+        start (int) : index of the first frame
+
+    Returns:
+        List of (start, end, label) tuples with times in sec
+    """
+    labels = np.where(silence, 'silence', np.where(zcr > music_speech_boundary, 'speech', 'music'))
+    return label_segments(labels, frame_len, start)
+
+
+def write_label_file(path, segments):
+    """
+    Write segments as a label file (tab separated start, end and label in sec, as used by Audacity).
+
+    Args:
+        path (str) : output file path
+        segments (list) : (start, end, label) tuples
+    """
+    with open(path, 'w') as f:
+        for start, end, label in segments:
+            f.write(f'{start:.6f}\t{end:.6f}\t{label}\n')
+
+
+# Precision ---------------------------------------------------------------
+
+# float64 computes everything in double precision. float32 halves the size of frames, ACF curves
+# and spectra, FFTs included (see fft_module). native additionally computes STE, volume, ZCR and silence directly on integer
+# samples (exact int64 accumulation), other features use float32.
+PRECISIONS = ('float64', 'float32', 'native')
+
+
+def compute_dtype(data):
+    """
+    Get floating point type used for results computed from data: float32 data stays
+    in float32, everything else (including integer samples) is computed in float64.
+    """
+    return np.float32 if data.dtype == np.float32 else np.float64
+
+
+def fft_module(data):
+    """
+    Get the FFT implementation for data: numpy.fft computes in complex128 whatever the input is,
+    so float32 data is transformed with scipy.fft (imported on first use), which keeps complex64.
+    """
+    if data.dtype == np.float32:
+        import scipy.fft
+        return scipy.fft
+    return np.fft
+
+
+# Channels ---------------------------------------------------------------
+
+CHANNEL_MODES = ('mid', 'max', 'channels')
+
+
+def mix_channels(data, mode='mid'):
+    """
+    Mix multichannel signal (N x channels) into the mid (mean) channel if mode is 'mid'.
+    Mono signals and other modes are returned unchanged.
+
+    Args:
+        data (array) : signal
+        mode (str) : one of CHANNEL_MODES
+
+    Returns:
+        Mixed signal
+    """
+    if mode == 'mid' and np.ndim(data) == 2:
+        return data.mean(axis=1)
+    return data
+
+
+def mix_scaled(data, scale=1, mode='mid', dtype=np.float64):
+    """
+    Divide raw samples by the scale of the whole signal (see scale_data) and mix channels
+    (see mix_channels). Data of dtype aren't copied if scale is 1. A module level function,
+    so process pools can take it (with functools.partial) to convert blocks of samples.
+
+    Args:
+        data (array) : raw signal
+        scale (float) : data are divided by scale
+        mode (str) : one of CHANNEL_MODES
+        dtype (type) : type of returned samples
+
+    Returns:
+        Scaled and mixed signal
+    """
+    if data.dtype != dtype or scale != 1:
+        data = np.divide(data, scale, dtype=dtype)
+    return mix_channels(data, mode)
+
+
+def reduce_channels(values, mode):
+    """
+    Reduce per-channel feature values (channels x ...) with maximum over channels if mode is 'max'.
+    Values of other modes are returned unchanged.
+
+    Args:
+        values (array) : feature values computed from multichannel frames
+        mode (str) : one of CHANNEL_MODES
+
+    Returns:
+        Reduced values
+    """
+    if mode == 'max':
+        return np.max(values, axis=0)
+    return values
+
+
+# Decimation ---------------------------------------------------------------
+
+def decimation_factor(fs, f_max=400, harmonics=5):
+    """
+    Choose the decimation factor of the signal used by pitch features. The decimated signal
+    keeps harmonics up to harmonics * f_max below 80% of its Nyquist frequency, where the
+    anti-aliasing filter of decimate passes them unchanged.
+
+    Args:
+        fs (int) : signal frequency
+        f_max (float) : highest detected frequency
+        harmonics (int) : number of kept harmonics of f_max
+
+    Returns:
+        Decimation factor, 1 if the signal can't be decimated
+    """
+    return max(int(0.4 * fs / (harmonics * f_max)), 1)
+
+
+def decimate(data, factor, convert=None, block_size=1 << 20):
+    """
+    Low-pass filter and downsample a signal by an integer factor with a polyphase FIR filter
+    (scipy.signal.resample_poly, imported on first use). The signal is filtered in blocks with
+    the filter's overlap, so the result equals decimating it at once but only one block of it
+    has to be converted.
+
+    Args:
+        data (array) : mono (N) or multichannel (N x channels) signal, e.g. memory mapped samples
+        factor (int) : decimation factor
+        convert (function) : applied to blocks of data before filtering (e.g. scaling, mixing)
+        block_size (int) : number of samples filtered at once
+
+    Returns:
+        Decimated signal, ceil(N / factor) samples
+    """
+    from scipy.signal import resample_poly
+
+    convert = convert or (lambda block: block)
+    # the filter of resample_poly spans 10 * factor samples on each side
+    overlap = 10 * factor
+    block_size = max(block_size - block_size % factor, factor)
+    blocks = []
+    for start in range(0, len(data), block_size):
+        stop = min(start + block_size, len(data))
+        first, last = max(start - overlap, 0), min(stop + overlap, len(data))
+        block = resample_poly(convert(data[first:last]), 1, factor, axis=0)
+        offset = (start - first) // factor
+        blocks.append(block[offset:offset + -(-(stop - start) // factor)])
+    return np.concatenate(blocks) if blocks else convert(data[:0])
+
+
+def decimated_frames(low, factor, first, n_frames, frame_length, frame_step):
+    """
+    Get frames of a decimated signal covering the same time as frames first to first + n_frames - 1
+    of the signal (see framing). Frames start at the nearest decimated sample, frames reaching
+    past the end of the signal are zero padded.
+
+    Args:
+        low (array) : mono (N) or multichannel (N x channels) signal decimated by factor (see decimate)
+        factor (int) : decimation factor
+        first (int) : index of the first frame
+        n_frames (int) : number of frames
+        frame_length (int) : frame length in samples of the signal
+        frame_step (int) : frame step in samples of the signal
+
+    Returns:
+        array of frames (n_frames x frame_length // factor, or channels x n_frames x frame_length // factor)
+    """
+    length = max(frame_length // factor, 1)
+    signal = low if low.ndim == 1 else low.T
+    if n_frames == 0:
+        return np.zeros(signal.shape[:-1] + (0, length), dtype=low.dtype)
+    starts = np.rint((first + np.arange(n_frames)) * frame_step / factor).astype(np.int64)
+    span = signal[..., starts[0]:starts[-1] + length]
+    missing = starts[-1] + length - starts[0] - span.shape[-1]
+    if missing > 0:
+        span = np.concatenate((span, np.zeros(span.shape[:-1] + (missing,), dtype=span.dtype)), axis=-1)
+    return span[..., (starts - starts[0])[:, np.newaxis] + np.arange(length)]
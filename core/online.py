@@ -0,0 +1,231 @@
+import argparse
+import collections
+import sys
+import time
+
+import numpy as np
+
+from core.functions import *
+from core.signal_store import SignalStore
+
+ONLINE_FEATURES = ('time', 'ste', 'volume', 'zcr', 'silence', 'voicing')
+
+
+class OnlineProcessor:
+    """
+    Incremental feature extraction for live audio. Blocks of samples of any size are pushed
+    as they arrive and features of every frame are returned as soon as its last sample is
+    available, so the delay of a frame is bounded by one block plus the processing time.
+
+    Frames start every frame_hop ms like in framing(). The last frame_len samples are kept
+    in a ring buffer and joined with the next block, so all frames completed by a block are
+    computed in a single vectorized pass. The signal isn't padded at the end.
+
+    Args:
+        fs (int) : signal frequency
+        frame_len (int) : frame length in ms
+        frame_hop (int) : frame step in ms
+        scale (float) : samples are divided by scale (e.g. 32768 for int16 input, see scale_data)
+        vol_max (float) : max volume of silent frames (see detect_silence)
+    """
+
+    def __init__(self, fs, frame_len=25, frame_hop=10, scale=1, vol_max=10e-3):
+        if frame_len < frame_hop:
+            raise ValueError('frame step can\'t be larger than frame length')
+        self.fs = fs
+        self.length = int(frame_len / 1000 * fs)
+        self.step = int(frame_hop / 1000 * fs)
+        self.scale = scale
+        self.vol_max = vol_max
+        self.stats = OnlineStats(fs)
+        self.reset()
+
+    def reset(self):
+        self._ring = np.zeros(self.length)
+        self._pos = 0
+        # number of samples received so far and index of the next frame to emit
+        self.n_samples = 0
+        self.n_frames = 0
+
+    def _history(self):
+        # last frame length samples in order of arrival
+        return np.concatenate((self._ring[self._pos:], self._ring[:self._pos]))
+
+    def _store(self, block):
+        if block.size >= self.length:
+            self._ring[:] = block[-self.length:]
+            self._pos = 0
+            return
+        end = self._pos + block.size
+        if end <= self.length:
+            self._ring[self._pos:end] = block
+        else:
+            split = self.length - self._pos
+            self._ring[self._pos:] = block[:split]
+            self._ring[:end - self.length] = block[split:]
+        self._pos = end % self.length
+
+    def push(self, block, arrival=None):
+        """
+        Process a block of new samples.
+
+        Args:
+            block (array) : new mono samples
+            arrival (float) : time.perf_counter() value when the block was received, used for latency stats
+
+        Returns:
+            Dict of feature arrays (see ONLINE_FEATURES) for frames completed by the block
+        """
+        start_time = time.perf_counter()
+        block = np.divide(block, self.scale, dtype=np.float64)
+        # samples received before this block, limited to those a new frame can still use
+        history = self._history()[max(self.length - self.n_samples, 0):]
+        buf = np.concatenate((history, block))
+        buf_start = self.n_samples - history.size
+        self.n_samples += block.size
+        self._store(block)
+
+        first = self.n_frames * self.step - buf_start
+        n_new = 0 if buf.size - first < self.length else (buf.size - first - self.length) // self.step + 1
+        frames = stride_trick(buf[first:], self.length, self.step)[:n_new] if n_new else np.zeros((0, self.length))
+        features = self._features(frames, self.n_frames)
+        self.n_frames += n_new
+
+        end_time = time.perf_counter()
+        self.stats.record(block.size, n_new, end_time - start_time,
+                          end_time - (start_time if arrival is None else arrival))
+        return features
+
+    def _features(self, frames, first_frame):
+        ste = short_time_energy_frames(frames)
+        return {
+            'time': (first_frame + np.arange(frames.shape[0])) * self.step / self.fs,
+            'ste': ste,
+            'volume': np.sqrt(ste),
+            'zcr': zero_crossing_rate_frames(frames),
+            'silence': detect_silence_frames(frames, self.vol_max),
+            'voicing': unvoice_phones_detection_frames(frames, self.fs)
+        }
+
+
+class OnlineStats:
+    """
+    Latency and throughput of an OnlineProcessor.
+
+    Latency of a block is the time from its arrival until its features are returned, throughput
+    is based on the processing time only. A frame
+    additionally waits for the rest of its block, so its worst case delay is block_latency()
+    plus the duration of a block.
+
+    Mean and maximal latency cover all blocks, percentiles the last window blocks, so memory
+    doesn't grow while a stream runs.
+
+    Args:
+        fs (int) : signal frequency
+        window (int) : number of latest block latencies kept for percentiles
+    """
+
+    def __init__(self, fs, window=10000):
+        self.fs = fs
+        self.blocks = 0
+        self.samples = 0
+        self.frames = 0
+        self.busy_time = 0.
+        self.total_latency = 0.
+        self.max_latency = 0.
+        self.latencies = collections.deque(maxlen=window)
+
+    def record(self, n_samples, n_frames, busy_time, latency):
+        self.blocks += 1
+        self.samples += n_samples
+        self.frames += n_frames
+        self.busy_time += busy_time
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.latencies.append(latency)
+
+    def block_latency(self, percentile=None):
+        """
+        Get maximal block latency in sec, or given percentile of latencies of the last window blocks.
+        """
+        if not self.latencies:
+            return 0.
+        if percentile is None:
+            return self.max_latency
+        return float(np.percentile(self.latencies, percentile))
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.blocks if self.blocks else 0.
+
+    @property
+    def realtime_factor(self):
+        # seconds of audio processed per second of computation
+        return self.samples / self.fs / self.busy_time if self.busy_time else float('inf')
+
+    @property
+    def frames_per_second(self):
+        return self.frames / self.busy_time if self.busy_time else float('inf')
+
+    def report(self):
+        return (f'{self.blocks} blocks, {self.frames} frames, {self.samples / self.fs:.1f}s of audio, '
+                f'{self.realtime_factor:.1f}x realtime, {self.frames_per_second:.0f} frames/s, '
+                f'latency mean {self.mean_latency * 1000:.3f}ms, '
+                f'p95 {self.block_latency(95) * 1000:.3f}ms, max {self.block_latency() * 1000:.3f}ms')
+
+
+class RealtimeFileSource:
+    """
+    Deliver blocks of a WAV file at the pace of real-time capture, to test an OnlineProcessor
+    without an audio device.
+
+    Args:
+        filename (str) : path to WAV file
+        block_size (int) : number of samples in a block
+        speed (float) : playback speed, 0 delivers blocks as fast as possible
+    """
+
+    def __init__(self, filename, block_size=512, speed=1.):
+        self.store = SignalStore(filename)
+        self.fs = self.store.fs
+        self.scale = self.store.scale
+        self.block_size = block_size
+        self.speed = speed
+
+    def __iter__(self):
+        """
+        Yields:
+            raw sample block, time.perf_counter() when the block was delivered
+        """
+        start = time.perf_counter()
+        for i, block in enumerate(signal_blocks(self.store.samples(), self.block_size)):
+            if self.speed:
+                # a block is available once its last sample was captured
+                ready = start + (i * self.block_size + len(block)) / self.fs / self.speed
+                delay = ready - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield block, time.perf_counter()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Print frame classes of a WAV file delivered in real time.')
+    parser.add_argument('filename', help='WAV file')
+    parser.add_argument('--block-size', type=int, default=512, help='number of samples in a block')
+    parser.add_argument('--speed', type=float, default=1., help='playback speed, 0 for as fast as possible')
+    parser.add_argument('--frame-len', type=int, default=25, help='frame length (ms)')
+    parser.add_argument('--frame-hop', type=int, default=10, help='frame step (ms)')
+    args = parser.parse_args(argv)
+
+    source = RealtimeFileSource(args.filename, block_size=args.block_size, speed=args.speed)
+    processor = OnlineProcessor(source.fs, frame_len=args.frame_len, frame_hop=args.frame_hop, scale=source.scale)
+    for block, arrival in source:
+        features = processor.push(block, arrival)
+        for t, silence, voicing in zip(features['time'], features['silence'], features['voicing']):
+            print(f'{t:8.3f} {"silence" if silence else "voiced" if voicing > 0.45 else "unvoiced"}')
+    print(processor.stats.report(), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+import errno
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.functions import framing_stream, join_blocks, padding_length, signal_blocks, stride_trick
+
+
+class ParallelFrameExecutor:
+    """
+    Process pool computing per-frame tracks of a single long signal on all cores.
+
+    Raw samples are copied once into shared memory and every worker converts (e.g. scales)
+    and pads the samples of its range chunk by chunk and takes frames with stride_trick, so
+    neither the signal nor frames are pickled and the shared copy is as small as the file.
+    Ranges are frame aligned, so each frame is computed exactly as by the serial path, and
+    results are stitched back in order. When shared memory can't hold the signal (e.g. a small
+    /dev/shm in containers), frames are computed serially in the calling process.
+
+    Workers are started with forkserver (spawn where it isn't available), which is safe
+    in processes running threads like the GUI. The pool is started on first use and kept
+    until close(), it can be shared by threads.
+
+    Args:
+        jobs (int) : number of worker processes, default is the number of cores
+        tasks_per_job (int) : ranges per worker, more ranges balance uneven load better
+    """
+
+    def __init__(self, jobs=None, tasks_per_job=4):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.tasks_per_job = tasks_per_job
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self, wait=True):
+        """
+        Stop the workers after they finish their ranges, or right away if wait is False.
+        """
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            if wait:
+                pool.close()
+            else:
+                pool.terminate()
+            pool.join()
+
+    def _get_pool(self):
+        # maps of several threads (e.g. GUI jobs) start a single pool
+        with self._pool_lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._pool = context.Pool(self.jobs)
+            return self._pool
+
+    def map(self, func, data, fs, win_len=0.025, win_hop=0.01, convert=None, args=(), kwargs=None,
+            shared=None, index=None, max_frames=4096, report=None):
+        """
+        Compute func(frames, *args, **kwargs) for all frames of the signal (see framing).
+
+        Args:
+            func (function) : module level function returning an array of per-frame values
+                              (frames along the last axis) or a dict of such arrays
+            data (array) : mono (N) or multichannel (N x channels) signal, e.g. memory mapped samples
+            fs (int) : signal frequency
+            win_len (float) : frame length in sec
+            win_hop (float) : frame step in sec
+            convert (function) : applied to ranges of data in the workers (e.g. scaling, mixing), a module
+                                 level function or functools.partial of one
+            args (tuple) : positional arguments of func after frames
+            kwargs (dict) : keyword arguments of func
+            shared (dict) : keyword arguments of func which are arrays (e.g. other versions of the signal),
+                            copied once into shared memory instead of being pickled for every range
+            index (str) : keyword argument of func receiving the index of the first of its frames
+            max_frames (int) : maximal number of frames passed to func at once
+            report (function) : called with the fraction of finished frames
+
+        Returns:
+            Per-frame values of all frames in order, like the result of func
+        """
+        convert = convert or _unchanged
+        kwargs, shared = kwargs or {}, shared or {}
+        length, step = int(win_len * fs), int(win_hop * fs)
+        probe = convert(data[:0])
+        pad_length = padding_length(len(data), win_len * fs, win_hop * fs)
+        total = len(data) + pad_length
+        if total < length:
+            return func(np.zeros(probe.shape[1:][::-1] + (0, length), dtype=probe.dtype), *args,
+                        **kwargs, **shared, **({index: 0} if index else {}))
+        n_frames = (total - length) // step + 1
+
+        blocks = []
+        submitted = []
+        try:
+            try:
+                blocks.append(_share(data))
+                shared_arrays = []
+                for name, array in shared.items():
+                    blocks.append(_share(array))
+                    shared_arrays.append((name, blocks[-1].name, array.shape, array.dtype.str))
+            except OSError:
+                return _map_serial(func, data, fs, win_len, win_hop, convert, args, kwargs, shared, index,
+                                   max_frames, report, n_frames)
+
+            task_frames = max(-(-n_frames // (self.jobs * self.tasks_per_job)), 1)
+            firsts = range(0, n_frames, task_frames)
+            task_sizes = [min(first + task_frames, n_frames) - first for first in firsts]
+            tasks = iter([(blocks[0].name, data.shape, data.dtype.str, shared_arrays, convert, first, first + size,
+                           length, step, max_frames, func, args, kwargs, index)
+                          for first, size in zip(firsts, task_sizes)])
+            # a range is submitted when another one finishes, so a map stopped by an exception
+            # (e.g. report cancelling the job) waits for at most one range per worker
+            pool, finished = self._get_pool(), queue.SimpleQueue()
+
+            def submit(task):
+                i = len(submitted)
+                submitted.append(pool.apply_async(_map_range, (task,), callback=lambda _: finished.put((i, None)),
+                                                  error_callback=lambda error: finished.put((i, error))))
+
+            for task in itertools.islice(tasks, self.jobs):
+                submit(task)
+            finished_frames = 0
+            for _ in task_sizes:
+                i, error = finished.get()
+                if error is not None:
+                    raise error
+                finished_frames += task_sizes[i]
+                for task in itertools.islice(tasks, 1):
+                    submit(task)
+                if report is not None:
+                    report(finished_frames / n_frames)
+            results = [result.get() for result in submitted]
+        finally:
+            # ranges still running read the shared memory
+            for result in submitted:
+                result.wait()
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return stitch(results)
+
+
+def stitch(results):
+    """
+    Join per-frame values of consecutive frame ranges along the last axis.
+
+    Args:
+        results (list) : arrays or dicts of arrays
+
+    Returns:
+        Joined array or dict of arrays
+    """
+    if isinstance(results[0], dict):
+        return {name: np.concatenate([result[name] for result in results], axis=-1) for name in results[0]}
+    return np.concatenate(results, axis=-1)
+
+
+def _unchanged(block):
+    return block
+
+
+def _share(array):
+    # copy an array into a new shared memory block, OSError if /dev/shm has no room for it
+    # (writing past its free space would kill the process with SIGBUS instead)
+    size = max(array.nbytes, 1)
+    if os.path.isdir('/dev/shm'):
+        stat = os.statvfs('/dev/shm')
+        if stat.f_bavail * stat.f_frsize < size:
+            raise OSError(errno.ENOSPC, 'not enough shared memory for the signal', '/dev/shm')
+    block = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block
+
+
+def _map_serial(func, data, fs, win_len, win_hop, convert, args, kwargs, shared, index, max_frames, report,
+                n_frames):
+    # frames of map computed in this process, block by block like the serial paths of the callers
+    results = []
+    first = 0
+    blocks = (convert(block) for block in signal_blocks(data))
+    for frames in framing_stream(blocks, fs, win_len, win_hop, max_frames=max_frames):
+        results.append(func(frames, *args, **kwargs, **shared, **({index: first} if index else {})))
+        first += frames.shape[-2]
+        if report is not None:
+            report(min(first / n_frames, 1))
+    return stitch(results)
+
+
+def _map_range(task):
+    # worker: compute func for frames [first, stop) of the shared signal
+    name, shape, dtype, shared_arrays, convert, *frame_range = task
+    blocks = [shared_memory.SharedMemory(name=name)]
+    try:
+        shared = {}
+        for array_name, array_shm_name, array_shape, array_dtype in shared_arrays:
+            blocks.append(shared_memory.SharedMemory(name=array_shm_name))
+            shared[array_name] = np.ndarray(array_shape, dtype=array_dtype, buffer=blocks[-1].buf)
+        return _compute_range(np.ndarray(shape, dtype=dtype, buffer=blocks[0].buf), convert, shared, *frame_range)
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _compute_range(data, convert, shared, first, stop, length, step, max_frames, func, args, kwargs, index):
+    results = []
+    for start in range(first, stop, max_frames):
+        end = min(start + max_frames, stop)
+        first_sample, stop_sample = start * step, (end - 1) * step + length
+        # converted samples are a copy, padded with zeros past the end of the signal like framing()
+        signal = join_blocks([convert(data[first_sample:stop_sample])], stop_sample - min(stop_sample, len(data)))
+        frames = stride_trick(signal, length, step)
+        results.append(func(frames, *args, **kwargs, **shared, **({index: start} if index else {})))
+    # stitching copies, so nothing refers to the shared memory afterwards
+    return stitch(results)
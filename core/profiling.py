@@ -0,0 +1,161 @@
+import contextlib
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Profiler:
+    """
+    Collects stage timings and counters. While disabled stage() returns a shared no-op
+    context manager, so instrumented code pays a single attribute check.
+
+    Stages are attributed to the user interaction (e.g. a click that changes the plot)
+    active on the thread that runs them, so background jobs can be traced back to the
+    interaction that submitted them.
+
+    Args:
+        enabled (bool) : start collecting right away
+        max_events (int) : number of most recent events kept for the trace
+    """
+
+    def __init__(self, enabled=False, max_events=100000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.stats = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._interaction_ids = itertools.count(1)
+        self._t0 = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.stats.clear()
+            self.counters.clear()
+
+    @property
+    def current_interaction(self):
+        return getattr(self._local, 'interaction', None)
+
+    def stage(self, name):
+        """
+        Time the enclosed block as stage name.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name)
+
+    def interaction(self, name):
+        """
+        Time the enclosed block as a new user interaction, stages inside are attributed to it.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._interaction(name)
+
+    def bind(self, interaction):
+        """
+        Attribute stages run on this thread in the enclosed block to interaction (e.g. in a worker).
+        """
+        if not self.enabled or interaction is None:
+            return _NULL_STAGE
+        return self._bind(interaction)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def _record(self, name, category, start, end):
+        elapsed = end - start
+        with self._lock:
+            count, total, longest = self.stats.get(name, (0, 0., 0.))
+            self.stats[name] = (count + 1, total + elapsed, max(longest, elapsed))
+            self.events.append((name, category, threading.get_ident(), start - self._t0, elapsed,
+                                self.current_interaction))
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, 'stage', start, time.perf_counter())
+
+    @contextlib.contextmanager
+    def _interaction(self, name):
+        # an interaction started from another one (e.g. load_file redrawing the plot) is its stage
+        if self.current_interaction is not None:
+            with self._stage(name):
+                yield
+            return
+        with self._bind(next(self._interaction_ids)):
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._record(name, 'interaction', start, time.perf_counter())
+
+    @contextlib.contextmanager
+    def _bind(self, interaction):
+        previous = self.current_interaction
+        self._local.interaction = interaction
+        try:
+            yield
+        finally:
+            self._local.interaction = previous
+
+    def summary(self):
+        """
+        Get statistics of all stages.
+
+        Returns:
+            List of (name, calls, total sec, mean sec, max sec) sorted by total time
+        """
+        with self._lock:
+            rows = [(name, count, total, total / count, longest)
+                    for name, (count, total, longest) in self.stats.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def export_trace(self, filename):
+        """
+        Write recorded events in the Chrome trace event format (chrome://tracing, Perfetto).
+        """
+        with self._lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        trace = [{'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                  'ts': start * 1e6, 'dur': elapsed * 1e6, 'args': {'interaction': interaction}}
+                 for name, category, tid, start, elapsed, interaction in events]
+        trace += [{'name': name, 'ph': 'C', 'pid': os.getpid(), 'ts': (time.perf_counter() - self._t0) * 1e6,
+                   'args': {name: value}} for name, value in counters.items()]
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+
+def timed(name=None):
+    """
+    Decorator timing each call of the function as a stage of the global profiler.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+profiler = Profiler(enabled=bool(os.environ.get('SOUND_PROFILE')))
@@ -0,0 +1,135 @@
+import copy
+
+import numpy as np
+
+from core.functions import mix_channels, reduce_channels
+
+
+def _energy(x, signs):
+    return x * x
+
+
+def _crossings(x, signs):
+    return np.abs(np.diff(signs, axis=0))
+
+
+class RangeIndex:
+    """
+    Prefix sums of per-sample terms of STE, ZCR, ACF and AMD, so the values of signal_values
+    for any selection are computed from two prefix sums instead of all selected samples.
+
+    Sums are kept at block boundaries only, a query adds the terms of the samples between
+    the boundaries and the ends of the selection. Its cost is at most two blocks whatever
+    the selection length, while the index takes 4 values per block (and channel).
+    ZCR and AMD are exact, STE and ACF differ from signal_values by float64 rounding.
+
+    Terms of ACF and AMD depend on the lag, they are rebuilt by with_lag and the
+    others are shared.
+
+    Args:
+        data (array) : mono (N) or multichannel (N x channels) signal (e.g. memory mapped samples)
+        lag (int) : lag number for ACF and AMD
+        scale (float) : samples are divided by scale (see scale_data)
+        channels (str) : handling of multichannel signals, one of CHANNEL_MODES
+        block_size (int) : number of samples between stored prefix sums
+        read_blocks (int) : number of blocks read at once while building
+        report (function) : called with the fraction of the signal indexed
+    """
+
+    def __init__(self, data, lag, scale=1, channels='mid', block_size=4096, read_blocks=256, report=None):
+        self.data = data
+        self.scale = scale
+        self.channels = channels
+        self.block_size = block_size
+        self.read_blocks = read_blocks
+        self.lag = lag
+        self.terms = {}
+        self.prefix = {}
+        self._add_terms({'energy': (_energy, 0), 'crossings': (_crossings, 1), **self._lag_terms(lag)}, report)
+
+    def with_lag(self, lag, report=None):
+        """
+        Get index of the same signal for another lag. Only ACF and AMD terms are computed.
+        """
+        index = copy.copy(self)
+        index.lag = lag
+        index.terms = {name: term for name, term in self.terms.items() if name in ('energy', 'crossings')}
+        index.prefix = {name: self.prefix[name] for name in index.terms}
+        index._add_terms(index._lag_terms(lag), report)
+        return index
+
+    @staticmethod
+    def _lag_terms(lag):
+        return {
+            'products': (lambda x, signs: x[lag:] * x[:len(x) - lag], lag),
+            'differences': (lambda x, signs: np.abs(signs[lag:] - signs[:len(signs) - lag]), lag),
+        }
+
+    def _read(self, start, stop):
+        # scaled (and mixed) samples along axis 0
+        return mix_channels(np.divide(self.data[start:stop], self.scale), self.channels)
+
+    def _add_terms(self, terms, report=None):
+        # one pass over the signal computing block sums of all terms, a term with extra
+        # needs extra samples past the block and is zero where they don't exist
+        n, size = len(self.data), self.block_size
+        step = size * self.read_blocks
+        extra = max(extra for _, extra in terms.values())
+        sums = {name: [] for name in terms}
+        for start in range(0, n, step):
+            stop = min(start + step, n)
+            x = self._read(start, min(stop + extra, n))
+            signs = np.sign(x)
+            n_blocks = -(-(stop - start) // size)
+            for name, (term, term_extra) in terms.items():
+                values = term(x, signs)[:stop - start]
+                blocks = np.zeros((n_blocks * size,) + values.shape[1:])
+                blocks[:len(values)] = values
+                sums[name].append(blocks.reshape((n_blocks, size) + values.shape[1:]).sum(axis=1))
+            if report is not None:
+                report(stop / n)
+        shape = self._read(0, 0).shape[1:]
+        for name, blocks in sums.items():
+            self.prefix[name] = np.concatenate([np.zeros((1,) + shape)] + blocks).cumsum(axis=0)
+        self.terms.update(terms)
+
+    def _sum(self, name, start, stop):
+        # sum of the term over [start, stop) of positions where it's defined
+        term, extra = self.terms[name]
+        stop = min(stop, len(self.data) - extra)
+        if stop <= start:
+            return np.zeros(self._read(0, 0).shape[1:])
+        first, last = -(-start // self.block_size), stop // self.block_size
+        if last <= first:
+            return term(*self._signal(start, stop + extra)).sum(axis=0)
+        head = term(*self._signal(start, first * self.block_size + extra)).sum(axis=0)
+        tail = term(*self._signal(last * self.block_size, stop + extra)).sum(axis=0)
+        return self.prefix[name][last] - self.prefix[name][first] + head + tail
+
+    def _signal(self, start, stop):
+        x = self._read(start, stop)
+        return x, np.sign(x)
+
+    def values(self, start, stop):
+        """
+        Compute short time energy, volume, zero crossing rate, ACF and AMD of samples [start, stop)
+        like signal_values.
+
+        Returns:
+            dict of values (arrays with one value per channel for channels='channels'),
+            None for an empty range
+        """
+        start, stop = max(start, 0), min(stop, len(self.data))
+        n = stop - start
+        if n <= 0:
+            return None
+        values = {
+            'ste': self._sum('energy', start, stop) / n,
+            'zcr': self._sum('crossings', start, stop - 1) / (2 * n),
+            'acf': self._sum('products', start, stop - self.lag),
+            'amd': self._sum('differences', start, stop - self.lag),
+        }
+        if self.channels == 'max':
+            values = {name: reduce_channels(value, 'max') for name, value in values.items()}
+        values['volume'] = np.sqrt(values['ste'])
+        return {name: value[()] for name, value in values.items()}
@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+
+from core.functions import decimate, mix_channels, signal_blocks
+
+
+class SignalStore:
+    """
+    WAV file opened as a memory map with a single normalization scale (see scale_data).
+    Multichannel files keep the (N x channels) layout of the file and share one scale.
+
+    Samples stay on disk until they are used. Raw ranges are zero-copy views of the file
+    and scaled ranges are computed only for the requested samples. Decimated copies for
+    pitch features are the only signal kept in memory.
+
+    Args:
+        filename (str) : path to WAV file
+        block_size (int) : number of samples read at once while computing the scale
+    """
+
+    def __init__(self, filename, block_size=1 << 22):
+        # scipy takes longer to import than numpy, so it's imported when the first file is opened
+        from scipy.io.wavfile import read
+
+        self.filename = filename
+        try:
+            self.fs, self.raw = read(filename, mmap=True)
+        except ValueError:
+            # formats which can't be memory mapped (e.g. 24-bit PCM) are read into memory
+            self.fs, self.raw = read(filename)
+        self.scale = self._compute_scale(block_size)
+        self._decimated = {}
+        self._decimated_lock = threading.Lock()
+
+    def _compute_scale(self, block_size):
+        scale = 0
+        for block in signal_blocks(self.raw, block_size):
+            scale = max(scale, abs(block.min().item()), abs(block.max().item()))
+        return scale
+
+    def __len__(self):
+        return len(self.raw)
+
+    @property
+    def channels(self):
+        return 1 if self.raw.ndim == 1 else self.raw.shape[1]
+
+    @property
+    def duration(self):
+        return len(self.raw) / self.fs
+
+    def samples(self, start=None, stop=None):
+        """
+        Get raw samples of given range without copying.
+
+        Args:
+            start (int) : first sample
+            stop (int) : sample after the last one
+
+        Returns:
+            View of the memory mapped samples
+        """
+        return self.raw[start:stop]
+
+    def scaled(self, start=None, stop=None, dtype=np.float64):
+        """
+        Get samples of given range scaled to [-1,1] with the scale of the whole file.
+
+        Args:
+            start (int) : first sample
+            stop (int) : sample after the last one
+            dtype (type) : type of returned samples
+
+        Returns:
+            Scaled signal data
+        """
+        return np.divide(self.raw[start:stop], self.scale, dtype=dtype)
+
+    def blocks(self, start=None, stop=None, block_size=1 << 20, dtype=np.float64):
+        """
+        Iterate over scaled blocks of given range (e.g. to feed framing_stream).
+
+        Yields:
+            Scaled signal blocks
+        """
+        for block in signal_blocks(self.raw[start:stop], block_size):
+            yield np.divide(block, self.scale, dtype=dtype)
+
+    def decimated(self, factor, channels='mid'):
+        """
+        Get the scaled signal mixed by channels (see mix_channels) and decimated by factor (see decimate).
+        The copy is computed once and shared by all tracks and threads.
+
+        Args:
+            factor (int) : decimation factor
+            channels (str) : handling of multichannel signals, one of CHANNEL_MODES
+
+        Returns:
+            Decimated signal
+        """
+        with self._decimated_lock:
+            if (factor, channels) not in self._decimated:
+                self._decimated[factor, channels] = decimate(
+                    self.raw, factor, convert=lambda block: mix_channels(np.divide(block, self.scale), channels))
+            return self._decimated[factor, channels]
@@ -1,26 +1,96 @@
-import copy
+import functools
+import os
 
-import matplotlib
 from PyQt5 import QtWidgets
-from PyQt5.QtCore import QUrl
+from PyQt5.QtCore import Qt, QThreadPool, QTimer, QUrl
 from PyQt5.QtGui import QIntValidator
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
-from matplotlib.figure import Figure
-from scipy.io.wavfile import read
 
-from gui.functions import *
-
-matplotlib.use('Qt5Agg')
-
-
-class AudioPlot(FigureCanvasQTAgg):
-    def __init__(self, parent=None, width=9, height=3, dpi=100):
-        fig = Figure(figsize=(width, height), dpi=dpi, tight_layout=True)
-        self.fig = fig
-        self.axes = fig.subplots(nrows=2)
-        self.axes[1].set_xlabel('Time (s)')
-        super(AudioPlot, self).__init__(fig)
+from core.disk_cache import DiskFeatureCache
+from core.envelope import EnvelopePyramid, SpectrogramPyramid
+from core.feature_cache import FeatureTrackCache
+from core.features import REGISTRY, compute_features, dependencies, related_features, signal_values
+from core.functions import *
+from core.parallel import ParallelFrameExecutor
+from core.profiling import profiler, timed
+from core.range_index import RangeIndex
+from core.signal_store import SignalStore
+from gui.workers import JobQueue
+
+# files with more frames are processed by all cores
+PARALLEL_MIN_FRAMES = 50000
+
+
+def _track_decimation(name, decimation):
+    # decimation is part of track keys only of features computed from decimated frames
+    return decimation if 'low_frames' in dependencies(name) else 1
+
+
+def _silence(ste):
+    return np.sqrt(ste) <= 10e-3
+
+
+class ProfilingPanel(QtWidgets.QDockWidget):
+    """
+    Dock showing stage timings of the profiler, refreshed while it's visible.
+    """
+    columns = ['Stage', 'Calls', 'Total (ms)', 'Mean (ms)', 'Max (ms)']
+
+    def __init__(self, parent=None):
+        super(ProfilingPanel, self).__init__('Profiling', parent)
+        self.table = QtWidgets.QTableWidget(0, len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.counters_label = QtWidgets.QLabel()
+
+        reset_button = QtWidgets.QPushButton(text='Reset')
+        reset_button.clicked.connect(self.reset)
+        export_button = QtWidgets.QPushButton(text='Export Trace')
+        export_button.clicked.connect(self.export_trace)
+
+        buttons_layout = QtWidgets.QHBoxLayout()
+        buttons_layout.addWidget(reset_button)
+        buttons_layout.addWidget(export_button)
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addWidget(self.counters_label)
+        layout.addLayout(buttons_layout)
+        widget = QtWidgets.QWidget()
+        widget.setLayout(layout)
+        self.setWidget(widget)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+        # collection enabled by SOUND_PROFILE goes on while the panel is hidden
+        self.always_enabled = profiler.enabled
+        self.visibilityChanged.connect(self._visibility_changed)
+
+    def _visibility_changed(self, visible):
+        profiler.enabled = visible or self.always_enabled
+        if visible:
+            self.timer.start()
+            self.refresh()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        rows = profiler.summary()
+        self.table.setRowCount(len(rows))
+        for i, (name, count, total, mean, longest) in enumerate(rows):
+            values = [name, str(count)] + [f'{value * 1000:.2f}' for value in (total, mean, longest)]
+            for j, value in enumerate(values):
+                self.table.setItem(i, j, QtWidgets.QTableWidgetItem(value))
+        self.counters_label.setText(', '.join(f'{name}: {value}' for name, value in profiler.counters.items()))
+
+    def reset(self):
+        profiler.reset()
+        self.refresh()
+
+    def export_trace(self):
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export trace", "", "Trace Files (*.json)")
+        if filename:
+            profiler.export_trace(filename)
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -28,9 +98,17 @@ class MainWindow(QtWidgets.QMainWindow):
         super(MainWindow, self).__init__(*args, **kwargs)
         self.resize(1200, 800)
         self.setWindowTitle('Sound Processing App')
-        self.plot = AudioPlot(self)
+        # matplotlib and QtMultimedia are loaded after the window is shown (see _setup_plot)
+        self.plot = None
+        self.toolbar = None
+        self.player = None
         self.fps = None
         self.data = None
+        self.store = None
+        self.wave_pyramid = None
+        self.feature_pyramid = None
+        self.spectrogram_pyramid = None
+        self.range_index = None
         self.duration = 0
         self.frame_len = 25
         self.frame_hop = 10
@@ -38,7 +116,23 @@ class MainWindow(QtWidgets.QMainWindow):
         self.freq0 = 0
         self.freq1 = 2000
         self.use_freq = False
+        self.track_cache = FeatureTrackCache()
+        # worker processes are started when the first long file is processed
+        self.executor = ParallelFrameExecutor() if (os.cpu_count() or 1) > 1 else None
+        try:
+            self.disk_cache = DiskFeatureCache()
+        except OSError as e:
+            print(f'Feature cache disabled: {e}')
+            self.disk_cache = None
+        self.thread_pool = QThreadPool()
+        self.plot_jobs = JobQueue(self.thread_pool, parent=self)
+        self.values_jobs = JobQueue(self.thread_pool, parent=self)
+        self.silence_jobs = JobQueue(self.thread_pool, debounce_ms=0, parent=self)
+        self.index_jobs = JobQueue(self.thread_pool, debounce_ms=0, parent=self)
+        self.export_jobs = JobQueue(self.thread_pool, debounce_ms=0, parent=self)
+        self.job_queues = (self.plot_jobs, self.values_jobs, self.silence_jobs, self.index_jobs, self.export_jobs)
         self._setup()
+        QTimer.singleShot(0, self._setup_plot)
 
     def _setup(self):
         main_layout = QtWidgets.QHBoxLayout()
@@ -46,24 +140,36 @@ class MainWindow(QtWidgets.QMainWindow):
         toolbar_layout = QtWidgets.QHBoxLayout()
 
         # plot and controls
-        self.toolbar = NavigationToolbar2QT(self.plot, self)
-
         load_button = QtWidgets.QPushButton(text='Load File')
         load_button.clicked.connect(self.load_file)
 
-        self.plot_type_dict = {
-            'Short Time Energy': (short_time_energy,),
-            'Zero Crossing Rate': (zero_crossing_rate,),
-            'Autocorrelation Function': (autocorrelation_function, 'use_lag'),
-            'Average Magnitude Difference': (average_magnitude_difference, 'use_lag'),
-            'Fundamental Frequency Detection': (fundamental_frequency_detection, 'use_fs'),
-            'Unvoice Phones Detection': (unvoice_phones_detection, 'use_fs'),
-            'FFT': (create_spectrum, 'fft'),
-            'Spectral Centroid': (spectral_centroid, 'use_kwargs'),
-            'Effective Bandwidth': (effective_bandwidth, 'use_kwargs'),
-            'Band Energy Ratio': (band_energy_ratio, 'use_kwargs'),
-            'Spectral Flatness Measure': (spectral_flatness_measure, 'use_kwargs'),
-            'Spectral Crest Factor': (spectral_crest_factor, 'use_kwargs')
+        export_button = QtWidgets.QPushButton(text='Export Labels')
+        export_button.clicked.connect(self.export_labels)
+
+        self.profiling_panel = ProfilingPanel(self)
+        self.profiling_panel.hide()
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.profiling_panel)
+        profiling_button = QtWidgets.QPushButton(text='Profiling')
+        profiling_button.setCheckable(True)
+        profiling_button.toggled.connect(self.profiling_panel.setVisible)
+        self.profiling_panel.visibilityChanged.connect(profiling_button.setChecked)
+
+        # per-frame features of the registry by label, views of the selection's spectrum are listed
+        # before the features computed from spectra
+        self.plot_type_dict = {feature.label: name for name, feature in REGISTRY.items() if feature.label is not None}
+        self.spectrum_view_dict = {
+            'FFT': create_spectrum,
+            'Spectrogram': spectrogram
+        }
+        plot_types = list(self.plot_type_dict)
+        first_spectral = next(i for i, name in enumerate(self.plot_type_dict.values())
+                              if 'spectrum' in dependencies(name))
+        plot_types[first_spectral:first_spectral] = self.spectrum_view_dict
+
+        self.segment_colors = {
+            'silence': 'red',
+            'speech': 'orange',
+            'music': 'green'
         }
 
         self.window_type_dict = {
@@ -76,23 +182,37 @@ class MainWindow(QtWidgets.QMainWindow):
         }
 
         self.plot_type_menu = QtWidgets.QComboBox()
-        self.plot_type_menu.addItems(list(self.plot_type_dict.keys()))
+        self.plot_type_menu.addItems(plot_types)
         self.plot_type_menu.currentTextChanged.connect(self.change_plot)
 
         self.window_type_menu = QtWidgets.QComboBox()
         self.window_type_menu.addItems(list(self.window_type_dict.keys()))
         self.window_type_menu.currentTextChanged.connect(self.change_plot)
 
-        toolbar_layout.addWidget(self.toolbar)
+        # multichannel files are drawn as the mid channel, features use the selected reduction
+        self.channel_mode_dict = {
+            'Mid Channel': 'mid',
+            'Max over Channels': 'max'
+        }
+
+        self.channel_mode_menu = QtWidgets.QComboBox()
+        self.channel_mode_menu.addItems(list(self.channel_mode_dict.keys()))
+        self.channel_mode_menu.setEnabled(False)
+        self.channel_mode_menu.currentTextChanged.connect(self.channel_mode_changed)
+
         toolbar_layout.addWidget(self.plot_type_menu)
         toolbar_layout.addWidget(self.window_type_menu)
+        toolbar_layout.addWidget(self.channel_mode_menu)
         toolbar_layout.addWidget(load_button)
+        toolbar_layout.addWidget(export_button)
+        toolbar_layout.addWidget(profiling_button)
         plot_layout.addLayout(toolbar_layout)
 
+        self.toolbar_layout = toolbar_layout
+
         plot_sunken_frame = QtWidgets.QFrame()
-        box = QtWidgets.QVBoxLayout()
-        box.addWidget(self.plot)
-        plot_sunken_frame.setLayout(box)
+        self.plot_box = QtWidgets.QVBoxLayout()
+        plot_sunken_frame.setLayout(self.plot_box)
         plot_sunken_frame.setLineWidth(3)
         plot_sunken_frame.setFrameShape(QtWidgets.QFrame.Shape.Panel)
         plot_sunken_frame.setFrameShadow(QtWidgets.QFrame.Shadow.Sunken)
@@ -101,18 +221,11 @@ class MainWindow(QtWidgets.QMainWindow):
         tip_label = QtWidgets.QLabel(text='Use left and right mouse buttons to select metrics range')
         tip_label.setFixedHeight(15)
         plot_layout.addWidget(tip_label)
-        self.plot.mpl_connect('button_press_event', self.select_range)
 
         # plot info
         info_layout = QtWidgets.QVBoxLayout()
         metrics_layout = QtWidgets.QGridLayout()
 
-        self.player = QMediaPlayer()
-        self.player.stateChanged.connect(self.audio_changed)
-        self.player.setNotifyInterval(100)
-        self.player.positionChanged.connect(self.display_time)
-        self.player.durationChanged.connect(self.duration_changed)
-
         self.player_label = QtWidgets.QLabel(text='0:00 / 0:00')
         self.play_button = QtWidgets.QPushButton()
         self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPlay))
@@ -205,6 +318,10 @@ class MainWindow(QtWidgets.QMainWindow):
         freq1_validator.setBottom(1)
         self.freq1_field.setValidator(freq1_validator)
 
+        # pitch features from a decimated copy of the signal (see extract_features)
+        self.decimate_pitch_box = QtWidgets.QCheckBox(text='Decimate signal for pitch')
+        self.decimate_pitch_box.toggled.connect(lambda checked: self.change_plot(s=self.plot_type_menu.currentText()))
+
         params_layout.addWidget(win_len_label, 0, 0)
         params_layout.addWidget(self.win_len_field, 0, 1)
         params_layout.addWidget(win_hop_label, 1, 0)
@@ -215,6 +332,7 @@ class MainWindow(QtWidgets.QMainWindow):
         params_layout.addWidget(self.freq0_field, 3, 1)
         params_layout.addWidget(freq1_label, 4, 0)
         params_layout.addWidget(self.freq1_field, 4, 1)
+        params_layout.addWidget(self.decimate_pitch_box, 5, 0, 1, 2)
 
         # setup layouts
         metrics_frame = QtWidgets.QFrame()
@@ -248,121 +366,424 @@ class MainWindow(QtWidgets.QMainWindow):
         main.setLayout(main_layout)
         self.setCentralWidget(main)
 
+        # progress of background computations
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        for queue in self.job_queues:
+            queue.progress.connect(lambda fraction: self.progress_bar.setValue(int(fraction * 100)))
+            queue.busy.connect(self._jobs_busy)
+
+    @timed('setup_plot')
+    def _setup_plot(self):
+        # the window is shown before the plot, so the imports below don't delay startup
+        if self.plot is not None:
+            return
+        from PyQt5.QtMultimedia import QMediaPlayer
+        from gui.plot import AudioPlot, NavigationToolbar2QT
+
+        self.plot = AudioPlot(self)
+        self.toolbar = NavigationToolbar2QT(self.plot, self)
+        self.toolbar_layout.insertWidget(0, self.toolbar)
+        self.plot_box.addWidget(self.plot)
+        self.plot.mpl_connect('button_press_event', self.select_range)
+
+        self.player = QMediaPlayer()
+        self.player.stateChanged.connect(self.audio_changed)
+        self.player.setNotifyInterval(100)
+        self.player.positionChanged.connect(self.display_time)
+        self.player.durationChanged.connect(self.duration_changed)
+
+    def _jobs_busy(self, _):
+        busy = any(queue.is_busy() for queue in self.job_queues)
+        if busy and not self.progress_bar.isVisible():
+            self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(busy)
+
     def load_file(self):
         filename, _ = QtWidgets.QFileDialog.getOpenFileName(self, "QFileDialog.getOpenFileName()", "",
                                                             "Audio Files (*.wav)")
-        if filename:
+        if not filename:
+            return
+        self._setup_plot()
+        with profiler.interaction('load_file'):
             print(f'Loading {filename}...')
-            self.fps, self.data = read(filename)
+            for queue in self.job_queues:
+                queue.cancel()
+            with profiler.stage('read_file'):
+                self.store = SignalStore(filename)
+            self.fps, self.data = self.store.fs, self.store.samples()
             print(f'File loaded successfully')
-            self._draw_plot(self.fps, scale_data(self.data))
-            self.change_plot(s=self.plot_type_menu.currentText())
+            self.track_cache.invalidate()
+            self.range_index = None
+            self.channel_mode_menu.setEnabled(self.store.channels > 1)
+            with profiler.stage('envelope'):
+                self.wave_pyramid = EnvelopePyramid(self.store.samples(), self.fps, scale=self.store.scale)
 
-            url = QUrl.fromLocalFile(filename)
-            content = QMediaContent(url)
-            self.player.setMedia(content)
+            with profiler.stage('media'):
+                from PyQt5.QtMultimedia import QMediaContent
+                self.player.setMedia(QMediaContent(QUrl.fromLocalFile(filename)))
 
-            self._set_values()
-            frames, _ = framing(sig=scale_data(self.data), fs=self.fps,
-                                win_len=self.frame_len / 1000, win_hop=self.frame_len / 1000)
-            self._mark_silence(axis=0, frames=frames, frame_len=self.frame_len / 1000)
-            self.plot.axes[0].legend()
+            self._redraw()
+
+    def _redraw(self):
+        self._draw_plot()
+        self.change_plot(s=self.plot_type_menu.currentText())
+        self._set_values()
+        self._run_job(self.silence_jobs, [self._track_key('ste', self.frame_len)], None,
+                      self._show_silence)
+        self._build_range_index()
+
+    def channel_mode_changed(self, s):
+        if self.store is None:
+            return
+        with profiler.interaction('channel_mode_changed'):
+            self._redraw()
+
+    def _show_silence(self, _):
+        with profiler.stage('segmentation'):
+            step = int(self.frame_len / 1000 * self.fps) / self.fps
+            self._mark_silence(axis=0, silence=self._silence_track(), frame_len=step)
+        self.plot.axes[0].legend()
+        with profiler.stage('draw'):
             self.plot.draw()
 
-    def _draw_plot(self, fps, data):
+    @timed('draw_plot')
+    def _draw_plot(self):
         self.plot.fig.clear(keep_observers=True)
         self.plot.axes = self.plot.fig.subplots(nrows=2, sharex='col')
         # self.plot.axes = self.plot.fig.subplots(nrows=2)
-        self.plot.axes[0].plot(np.array(range(len(data))) / fps, data)
+        duration = self.wave_pyramid.duration
+        self.wave_line, = self.plot.axes[0].plot(*self.wave_pyramid.view(0, duration, self._axis_width(0)))
+        self.feature_pyramid = None
+        self.feature_line = None
+        self.spectrogram_pyramid = None
+        self.spectrogram_image = None
         self.plot.axes[1].set_xlabel('Time (s)')
         self.line1 = self.plot.axes[0].axvline(x=0, color='green')
-        self.line2 = self.plot.axes[0].axvline(x=(len(data) / fps), color='red')
+        self.line2 = self.plot.axes[0].axvline(x=duration, color='red')
+        self.plot.axes[0].callbacks.connect('xlim_changed', self._view_changed)
         self.range_field.setText(str(int(abs(self.line1.get_xdata()[0] - self.line2.get_xdata()[0]) * 1000)))
 
     def change_plot(self, s):
-        func, *args = self.plot_type_dict.get(self.plot_type_menu.currentText())
-        window_func = self.window_type_dict.get(self.window_type_menu.currentText())
+        with profiler.interaction('change_plot'):
+            self._change_plot()
+
+    def _change_plot(self):
+        plot_type = self.plot_type_menu.currentText()
+        window_name = self.window_type_menu.currentText()
         if (self.fps is None) or (self.data is None):
             return
 
-        data = self.data
         x1, x2 = self._get_line_xpos()
-        data = self.data[int(x1 * self.fps):int(x2 * self.fps)]
-        if window_func is not None:
-            frames2, _ = framing(sig=scale_data(data), fs=self.fps,
-                                 win_len=self.frame_len / 1000, win_hop=self.frame_len / 1000)
-            data = np.apply_along_axis(use_window_function, 1, frames2, window_func).reshape(-1)
-
-        frames, _ = framing(sig=scale_data(data), fs=self.fps,
-                            win_len=self.frame_len / 1000, win_hop=self.frame_hop / 1000)
-        frames2, _ = framing(sig=scale_data(data), fs=self.fps,
-                             win_len=self.frame_len / 1000, win_hop=self.frame_len / 1000)
-        kwargs = {'lag': self.lag, 'fs': self.fps, 'freq_0': self.freq0, 'freq_1': self.freq1}
-
-        if 'use_kwargs' in args:
-            data = np.apply_along_axis(func1d=func, axis=1, arr=frames, **kwargs)
-        elif 'use_lag' in args:
-            data = np.apply_along_axis(func1d=func, axis=1, arr=frames, lag=self.lag)
-        elif 'use_fs' in args:
-            data = np.apply_along_axis(func1d=func, axis=1, arr=frames, fs=self.fps)
-        elif 'fft' in args:
-            data = scale_data(data)
-            data, freqs = func(data, **kwargs)
-        elif func == zero_crossing_rate:
-            data = np.apply_along_axis(func1d=func, axis=1, arr=frames2)
+        if plot_type == 'FFT':
+            func = self.spectrum_view_dict[plot_type]
+            window_func = self.window_type_dict.get(window_name)
+            store, start, stop = self.store, int(x1 * self.fps), int(x2 * self.fps)
+
+            def spectrum(report):
+                data = mix_channels(store.scaled(start, stop), 'mid')
+                if window_func is not None:
+                    with profiler.stage('windowing'):
+                        data = apply_window(data, window_func)
+                with profiler.stage('feature:FFT'):
+                    return func(data, fs=store.fs)
+
+            self._run_job(self.plot_jobs, [], spectrum, self._draw_spectrum)
+        elif plot_type == 'Spectrogram':
+            func = self.spectrum_view_dict[plot_type]
+            window_func = self.window_type_dict.get(window_name)
+            store, start, stop = self.store, int(x1 * self.fps), int(x2 * self.fps)
+            frame_len, frame_hop = self.frame_len / 1000, self.frame_hop / 1000
+
+            def stft(report):
+                data = store.samples(start, stop)
+                if len(data) < int(frame_len * store.fs):
+                    return None
+                with profiler.stage('feature:Spectrogram'):
+                    # columns are computed from scaled blocks of the memory map
+                    db, _, freqs = func(data, store.fs, frame_len, frame_hop, win_fun=window_func,
+                                        convert=functools.partial(mix_scaled, scale=store.scale))
+                with profiler.stage('envelope'):
+                    return SpectrogramPyramid(db, int(frame_hop * store.fs) / store.fs, freqs, t0=start / store.fs)
+
+            self._run_job(self.plot_jobs, [], stft, self._draw_spectrogram)
         else:
-            data = np.apply_along_axis(func1d=func, axis=1, arr=frames)
+            name = self.plot_type_dict[plot_type]
+            hop = self.frame_len if name == 'zcr' else self.frame_hop
+            keys = [self._track_key(name, hop, window_name)]
+            if name == 'zcr':
+                keys.append(self._track_key('ste', self.frame_len))
+            self._run_job(self.plot_jobs, keys, None, lambda _: self._draw_feature(name, hop, window_name))
+
+    def _draw_spectrum(self, spectrum):
+        data, freqs = spectrum
+        self.plot.axes[1].clear()
+        self.feature_pyramid = None
+        self.feature_line = None
+        self.spectrogram_pyramid = None
+        self.plot.axes[1].plot(freqs, data)
+        self.plot.axes[1].set_xlabel('Frequency (HZ)')
+        self.plot.axes[1].legend()
+        with profiler.stage('draw'):
+            self.plot.draw()
 
-        if func == create_spectrum:
-            self.plot.axes[1].clear()
-            self.plot.axes[1].plot(freqs, data)
-            self.plot.axes[1].set_xlabel('Frequency (HZ)')
-        else:
-            self.plot.axes[1].clear()
-            time_seconds = len(self.data) / self.fps
-            self.plot.axes[1].plot(np.linspace(0, time_seconds, len(data)), data)
-            self.plot.axes[1].set_xlabel('Time (s)')
-            if func == unvoice_phones_detection:
-                self.plot.axes[1].hlines(0.45, xmin=0, xmax=time_seconds, colors='orange',
-                                        linestyles='dashed', label='the boundary between voiced and unvoiced phones')
-            if func == zero_crossing_rate:
-                self.plot.axes[1].set_ylim([0, 1])
-                self._mark_silence(axis=1, frames=frames2, frame_len=self.frame_len / 1000)
-                silence = np.apply_along_axis(detect_silence, 1, frames2, vol_max=10e-3)
-                self._mark_audio_type(axis=1, frame_len=self.frame_len / 1000, silence=silence, zcr=data)
+    def _draw_spectrogram(self, pyramid):
+        xlim = self.plot.axes[0].get_xlim()
+        self.plot.axes[1].clear()
+        self.feature_pyramid = None
+        self.spectrogram_pyramid = pyramid
+        if pyramid is not None:
+            image, extent = pyramid.view(*xlim, self._axis_width(1))
+            self.spectrogram_image = self.plot.axes[1].imshow(image, origin='lower', aspect='auto', extent=extent,
+                                                              interpolation='nearest', cmap='magma')
+            # zooming replaces the image, which mustn't move the shared time axis
+            self.plot.axes[1].set_autoscale_on(False)
+            self.plot.axes[1].set_xlim(xlim)
+        self.plot.axes[1].set_xlabel('Time (s)')
+        self.plot.axes[1].set_ylabel('Frequency (HZ)')
+        with profiler.stage('draw'):
+            self.plot.draw()
+
+    def _draw_feature(self, name, hop, window_name):
+        x1, x2 = self._get_line_xpos()
+        xlim = self.plot.axes[0].get_xlim()
+        self.plot.axes[1].clear()
+        self.spectrogram_pyramid = None
+        start, stop = self._frame_range(x1, x2, hop)
+        data = self._feature_track(name, hop, window_name)[start:stop]
+        step = int(hop / 1000 * self.fps) / self.fps
+        with profiler.stage('envelope'):
+            self.feature_pyramid = EnvelopePyramid(data, 1 / step, t0=start * step)
+        self.feature_line, = self.plot.axes[1].plot(*self.feature_pyramid.view(*xlim, self._axis_width(1)))
+        self.plot.axes[1].set_xlim(xlim)
+        self.plot.axes[1].set_xlabel('Time (s)')
+        if name == 'voicing':
+            self.plot.axes[1].hlines(0.45, xmin=x1, xmax=x2, colors='orange',
+                                    linestyles='dashed', label='the boundary between voiced and unvoiced phones')
+        if name == 'zcr':
+            self.plot.axes[1].set_ylim([0, 1])
+            with profiler.stage('segmentation'):
+                silence = self._silence_track()[start:stop]
+                self._mark_audio_type(axis=1, frame_len=step, silence=silence, zcr=data, start=start)
 
         self.plot.axes[1].legend()
-        self.plot.draw()
+        with profiler.stage('draw'):
+            self.plot.draw()
+
+    def _axis_width(self, axis):
+        return max(int(self.plot.axes[axis].bbox.width), 1)
+
+    @timed('view_changed')
+    def _view_changed(self, axes):
+        # redraw lines from the envelope level matching the new view
+        x0, x1 = axes.get_xlim()
+        self.wave_line.set_data(*self.wave_pyramid.view(x0, x1, self._axis_width(0)))
+        if self.feature_pyramid is not None:
+            self.feature_line.set_data(*self.feature_pyramid.view(x0, x1, self._axis_width(1)))
+        if self.spectrogram_pyramid is not None:
+            image, extent = self.spectrogram_pyramid.view(x0, x1, self._axis_width(1))
+            self.spectrogram_image.set_data(image)
+            self.spectrogram_image.set_extent(extent)
+        self.plot.draw_idle()
+
+    def _frame_range(self, x1, x2, hop):
+        step = int(hop / 1000 * self.fps)
+        start = int(np.ceil(x1 * self.fps / step))
+        stop = max(start, int(np.ceil(x2 * self.fps / step)))
+        return start, stop
+
+    def _run_job(self, queue, keys, compute, callback):
+        # compute missing feature tracks and compute(report) in the background,
+        # then cache the tracks and pass the result of compute to callback
+        missing = [key for key in keys if key not in self.track_cache]
+        store = self.store
+        interaction = profiler.current_interaction
+
+        def job(report):
+            with profiler.bind(interaction), profiler.stage('job'):
+                tracks = {}
+                for i, key in enumerate(missing):
+                    if key not in tracks:
+                        tracks.update(self._load_tracks(store, key, lambda f: report((i + f) / len(missing))))
+                return tracks, compute(report) if compute is not None else None
+
+        def done(result):
+            tracks, value = result
+            for key, track in tracks.items():
+                self.track_cache.put(key, track)
+            with profiler.bind(interaction), profiler.stage('show_result'):
+                callback(value)
+
+        queue.submit(job, done)
+
+    def _track_key(self, name, hop, window_name='No window'):
+        channels = self.channel_mode_dict[self.channel_mode_menu.currentText()]
+        decimation = decimation_factor(self.fps) if self.decimate_pitch_box.isChecked() else 1
+        return (name, self.frame_len, hop, self.lag, window_name, self.freq0, self.freq1, channels,
+                _track_decimation(name, decimation))
+
+    def _feature_track(self, name, hop, window_name='No window'):
+        key = self._track_key(name, hop, window_name)
+        track = self.track_cache.get(key)
+        if track is None:
+            tracks = self._load_tracks(self.store, key)
+            for track_key, track_values in tracks.items():
+                self.track_cache.put(track_key, track_values)
+            track = tracks[key]
+        return track
+
+    def _load_tracks(self, store, key, report=None):
+        # read the track from the disk cache, or compute it and store all computed tracks
+        if self.disk_cache is None:
+            return self._compute_tracks(store, key, report)
+        with profiler.stage('disk_cache'):
+            content_hash = self.disk_cache.content_hash(store.filename)
+            entry = self.disk_cache.get(content_hash, key)
+        if entry is not None:
+            profiler.count('disk_cache_hits')
+            return {key: entry['track']}
+        tracks = self._compute_tracks(store, key, report)
+        with profiler.stage('disk_cache'):
+            for track_key, track in tracks.items():
+                self.disk_cache.put(content_hash, track_key, {'track': track})
+        return tracks
+
+    def _compute_tracks(self, store, key, report=None):
+        # features sharing ACF curves or spectra are computed together, so switching
+        # between them doesn't repeat the FFTs
+        name, frame_len, hop, lag, window_name, freq0, freq1, channels, decimation = key
+        names = related_features(name)
+        options = {'fs': store.fs, 'lag': lag, 'freq_0': freq0, 'freq_1': freq1, 'channels': channels,
+                   'win_fun': self.window_type_dict.get(window_name)}
+        fs = store.fs
+        shared = {}
+        if decimation > 1:
+            # features computed along with pitch features use full rate frames whatever their key
+            with profiler.stage('decimation'):
+                shared['low_signal'] = store.decimated(decimation, channels)
+            options.update(decimation=decimation, frame_step=int(hop / 1000 * fs))
+
+        def track_key(n):
+            return (n,) + key[1:-1] + (_track_decimation(n, decimation),)
+        n_frames = max(len(store) // int(hop / 1000 * fs), 1)
+        max_frames = 4096 if channels == 'mid' else max(4096 // store.channels, 1)
+
+        if self.executor is not None and n_frames >= PARALLEL_MIN_FRAMES:
+            # long files are split between processes, results are the same
+            with profiler.stage('parallel'):
+                values = self.executor.map(compute_features, store.samples(), fs, frame_len / 1000, hop / 1000,
+                                           convert=functools.partial(mix_scaled, scale=store.scale, mode=channels),
+                                           kwargs={'names': names, **options}, shared=shared, index='first_frame',
+                                           max_frames=max_frames, report=report)
+            profiler.count('frames', values[name].shape[-1])
+            return {track_key(n): values[n] for n in names}
+
+        chunks = {n: [] for n in names}
+        done = 0
+        blocks = (mix_channels(block, channels) for block in store.blocks())
+        stream = framing_stream(blocks, fs=fs, win_len=frame_len / 1000, win_hop=hop / 1000, max_frames=max_frames)
+        while True:
+            with profiler.stage('framing'):
+                frames = next(stream, None)
+            if frames is None:
+                break
+            values = compute_features(frames, names, stage=profiler.stage, first_frame=done, **options, **shared)
+            for n in names:
+                chunks[n].append(values[n])
+            done += frames.shape[-2]
+            profiler.count('frames', frames.shape[-2])
+            if report is not None:
+                report(min(done / n_frames, 1))
+        return {track_key(n): np.concatenate(values) if values else np.zeros(0) for n, values in chunks.items()}
+
+    def _silence_track(self):
+        return _silence(self._feature_track('ste', self.frame_len))
+
+    def _build_range_index(self):
+        # selection values are computed from the samples until the index of the current lag
+        # and channel mode is built, a new lag only recomputes the lagged sums
+        channels = self.channel_mode_dict[self.channel_mode_menu.currentText()]
+        index, store, lag = self.range_index, self.store, self.lag
+        if index is not None and (index.lag, index.channels) == (lag, channels):
+            return
+        interaction = profiler.current_interaction
+
+        def build(report):
+            with profiler.bind(interaction), profiler.stage('range_index'):
+                if index is not None and index.channels == channels:
+                    return index.with_lag(lag, report)
+                return RangeIndex(store.samples(), lag, scale=store.scale, channels=channels, report=report)
+
+        def done(new_index):
+            self.range_index = new_index
+            self._set_values()
+
+        self.index_jobs.submit(build, done)
 
     def _set_values(self):
-        x1, x2 = self._get_line_xpos()
+        with profiler.interaction('set_values'):
+            self._set_values_job()
 
-        data = scale_data(self.data)[int(x1 * self.fps):int(x2 * self.fps)]
-        frames, _ = framing(sig=data, fs=self.fps,
-                            win_len=self.frame_len / 1000, win_hop=self.frame_hop / 1000)
-        frames2, _ = framing(sig=data, fs=self.fps,
-                             win_len=self.frame_len / 1000, win_hop=self.frame_len / 1000)
-        if len(data) == 0:
+    def _set_values_job(self):
+        x1, x2 = self._get_line_xpos()
+        store, lag = self.store, self.lag
+        channels = self.channel_mode_dict[self.channel_mode_menu.currentText()]
+        start, stop = int(x1 * self.fps), int(x2 * self.fps)
+        index = self.range_index
+        if index is not None and (index.lag, index.channels) != (lag, channels):
+            index = None
+
+        def selection_values(report):
+            if index is not None:
+                with profiler.stage('selection_values'):
+                    return index.values(start, stop)
+            # until the index is built the samples are read block by block, selections can be the whole file
+            data = store.samples(max(start, 0), max(stop, 0))
+            if len(data) == 0:
+                return None
+            with profiler.stage('selection_values'):
+                return signal_values(data, lag, channels, scale=store.scale)
+
+        keys = [self._track_key('ste', self.frame_hop),
+                self._track_key('zcr', self.frame_len)]
+        self._run_job(self.values_jobs, keys, selection_values, self._show_values)
+
+    def _show_values(self, values):
+        x1, x2 = self._get_line_xpos()
+        start, stop = self._frame_range(x1, x2, self.frame_hop)
+        start2, stop2 = self._frame_range(x1, x2, self.frame_len)
+        if values is None or start == stop or start2 == stop2:
             return
 
-        self.lster_field.setText(str(round(low_short_time_energy_ratio(frames), 3)))
-        zcr = np.apply_along_axis(zero_crossing_rate, 1, frames2)
+        ste = self._feature_track('ste', self.frame_hop)[start:stop]
+        self.lster_field.setText(str(round(low_short_time_energy_ratio(None, ste=ste), 3)))
+        zcr = self._feature_track('zcr', self.frame_len)[start2:stop2]
         self.hzcrr_field.setText(str(round(high_zero_crossing_rate_ratio(zcr, zcr.shape[0]), 4)))
-        self.ste_field.setText(str(round(short_time_energy(data), 3)))
-        self.zcr_field.setText(str(round(zero_crossing_rate(data), 3)))
-        self.acf_field.setText(str(round(autocorrelation_function(data, lag=self.lag), 3)))
-        self.amd_field.setText(str(round(average_magnitude_difference(data, lag=self.lag), 3)))
+        self.ste_field.setText(str(round(values['ste'], 3)))
+        self.zcr_field.setText(str(round(values['zcr'], 3)))
+        self.acf_field.setText(str(round(values['acf'], 3)))
+        self.amd_field.setText(str(round(values['amd'], 3)))
+
+    def closeEvent(self, event):
+        if self.executor is not None:
+            self.executor.close(wait=False)
+        super().closeEvent(event)
 
     def audio_play(self):
-        if self.player.state() == QMediaPlayer.PlayingState:
+        if self.player is None:
+            return
+        if self.player.state() == self.player.PlayingState:
             self.player.pause()
         else:
             self.player.play()
 
     def audio_changed(self, s):
-        if s == QMediaPlayer.StoppedState:
+        if s == self.player.StoppedState:
             self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPlay))
-        elif s == QMediaPlayer.PlayingState:
+        elif s == self.player.PlayingState:
             self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPause))
         else:  # paused
             self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPlay))
@@ -390,11 +811,16 @@ class MainWindow(QtWidgets.QMainWindow):
             msg.exec_()
             return
 
+        if (frame_len, frame_hop, lag, freq0, freq1) != (self.frame_len, self.frame_hop, self.lag, self.freq0,
+                                                          self.freq1):
+            self.track_cache.invalidate()
         self.frame_len = frame_len
         self.frame_hop = frame_hop
         self.lag = lag
         self.freq0 = freq0
         self.freq1 = freq1
+        if self.store is not None:
+            self._build_range_index()
 
         self.change_plot(s=self.plot_type_menu.currentText())
 
@@ -410,34 +836,62 @@ class MainWindow(QtWidgets.QMainWindow):
         x1, x2 = self._get_line_xpos()
 
         self.range_field.setText(str(int(abs(x1 - x2) * 1000)))
-        self._set_values()
-        self.change_plot(s=self.plot_type_menu.currentText())
+        with profiler.interaction('select_range'):
+            self._set_values()
+            self.change_plot(s=self.plot_type_menu.currentText())
 
-    def _mark_silence(self, axis, frames, frame_len):
-        silence = np.apply_along_axis(detect_silence, 1, frames, vol_max=10e-3)
-        j = 0
-        for i in range(len(silence)):
-            if silence[i]:
-                self._color_region(axis, frame_len * i, frame_len * (i + 1), 'red', '_' * j + 'silence')
-                j += 1
+    def _mark_silence(self, axis, silence, frame_len, start=0):
+        intervals = (flag_segments(silence) + start) * frame_len
+        self._draw_segments(axis, [(x1, x2, 'silence') for x1, x2 in intervals])
 
-    def _mark_audio_type(self, axis, frame_len, silence, zcr):
+    def _mark_audio_type(self, axis, frame_len, silence, zcr, start=0):
         music_speech_boundary = 0.15
-        # frame_len = self.fps * frame_len
-        music_speech_array = copy.deepcopy(silence)
-        m = 0
-        s = 0
-        for i in range(len(music_speech_array)):
-            if not silence[i]:
-                if zcr[i] > music_speech_boundary:
-                    self._color_region(axis, frame_len * i, frame_len * (i + 1), 'orange', '_' * s + 'speech')
-                    s += 1
-                else:
-                    self._color_region(axis, frame_len * i, frame_len * (i + 1), 'green', '_' * m + 'music')
-                    m += 1
-
-    def _color_region(self, axis, x1, x2, color, label):
-        self.plot.axes[axis].axvspan(x1, x2, facecolor=color, label=label, alpha=0.3)
+        segments = audio_type_segments(silence, zcr, frame_len, music_speech_boundary, start=start)
+        self._draw_segments(axis, segments)
+
+    def _draw_segments(self, axis, segments):
+        # one collection per class, spanning the whole height of the axis
+        ax = self.plot.axes[axis]
+        for label, color in self.segment_colors.items():
+            ranges = [(x1, x2 - x1) for x1, x2, segment_label in segments if segment_label == label]
+            if ranges:
+                ax.broken_barh(ranges, (0, 1), transform=ax.get_xaxis_transform(), facecolors=color,
+                               alpha=0.3, label=label)
+
+    def export_labels(self):
+        if self.store is None:
+            return
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export labels", "", "Label Files (*.txt)")
+        if not filename:
+            return
+        # tracks missing from the memory cache are read or computed in the background
+        keys = [self._track_key('zcr', self.frame_len), self._track_key('ste', self.frame_len)]
+        tracks = {key: self.track_cache.get(key) for key in keys}
+        store, step = self.store, int(self.frame_len / 1000 * self.fps) / self.fps
+        with profiler.interaction('export_labels'):
+            self._run_job(self.export_jobs, [], lambda report: self._audio_type_segments(store, tracks, step, report),
+                          lambda segments: write_label_file(filename, segments))
+
+    def _audio_type_segments(self, store, tracks, step, report):
+        # segmentation of the whole file, kept in the disk cache with the tracks it's made from;
+        # runs in a job, so it only reads tracks passed from the memory cache
+        (zcr_key, zcr), (ste_key, ste) = tracks.items()
+        key = ('Segments',) + zcr_key[1:]
+        content_hash = self.disk_cache.content_hash(store.filename) if self.disk_cache is not None else None
+        entry = self.disk_cache.get(content_hash, key) if content_hash is not None else None
+        if entry is not None:
+            return list(zip(entry['start'], entry['end'], entry['label']))
+
+        if zcr is None:
+            zcr = self._load_tracks(store, zcr_key, lambda f: report(f / 2))[zcr_key]
+        if ste is None:
+            ste = self._load_tracks(store, ste_key, lambda f: report(0.5 + f / 2))[ste_key]
+        segments = audio_type_segments(_silence(ste), zcr, step)
+        if content_hash is not None and segments:
+            start, end, label = zip(*segments)
+            self.disk_cache.put(content_hash, key, {'start': np.array(start), 'end': np.array(end),
+                                                    'label': np.array(label)})
+        return segments
 
     def _get_line_xpos(self):
         if isinstance(self.line1.get_xdata(), list):
@@ -0,0 +1,14 @@
+import matplotlib
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+from matplotlib.figure import Figure
+
+matplotlib.use('Qt5Agg')
+
+
+class AudioPlot(FigureCanvasQTAgg):
+    def __init__(self, parent=None, width=9, height=3, dpi=100):
+        fig = Figure(figsize=(width, height), dpi=dpi, tight_layout=True)
+        self.fig = fig
+        self.axes = fig.subplots(nrows=2)
+        self.axes[1].set_xlabel('Time (s)')
+        super(AudioPlot, self).__init__(fig)
@@ -0,0 +1,122 @@
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class WorkerSignals(QObject):
+    progress = pyqtSignal(int, float)
+    finished = pyqtSignal(int, object)
+    error = pyqtSignal(int, str)
+
+
+class Worker(QRunnable):
+    """
+    Runs fn(report) on a thread pool. fn calls report(fraction) to publish progress,
+    which raises JobCancelled once the job was cancelled.
+    """
+
+    def __init__(self, job_id, fn):
+        super(Worker, self).__init__()
+        self.job_id = job_id
+        self.fn = fn
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def report(self, fraction):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self.signals.progress.emit(self.job_id, fraction)
+
+    def run(self):
+        try:
+            result = self.fn(self.report)
+        except JobCancelled:
+            return
+        except Exception:
+            self.signals.error.emit(self.job_id, traceback.format_exc())
+            return
+        if not self._cancelled.is_set():
+            self.signals.finished.emit(self.job_id, result)
+
+
+class JobQueue(QObject):
+    """
+    Runs only the latest of the submitted jobs. Submissions are debounced and each new one
+    cancels the job that is still running, so results of stale jobs are never delivered.
+
+    Args:
+        pool (QThreadPool) : thread pool running the jobs
+        debounce_ms (int) : delay before the latest submitted job is started
+    """
+    progress = pyqtSignal(float)
+    busy = pyqtSignal(bool)
+
+    def __init__(self, pool=None, debounce_ms=100, parent=None):
+        super(JobQueue, self).__init__(parent)
+        self.pool = pool if pool is not None else QThreadPool.globalInstance()
+        self.job_id = 0
+        self._pending = None
+        self._worker = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._start)
+
+    def submit(self, fn, on_result):
+        """
+        Schedule fn(report) and deliver its result to on_result on the GUI thread.
+        """
+        self.cancel()
+        self._pending = (fn, on_result)
+        self._timer.start()
+        self.busy.emit(True)
+
+    def cancel(self):
+        self.job_id += 1
+        self._timer.stop()
+        self._pending = None
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        self.busy.emit(False)
+
+    def is_busy(self):
+        return self._pending is not None or self._worker is not None
+
+    def _start(self):
+        if self._pending is None:
+            return
+        fn, on_result = self._pending
+        self._pending = None
+        worker = Worker(self.job_id, fn)
+        worker.signals.progress.connect(self._on_progress)
+        worker.signals.finished.connect(lambda job_id, result: self._on_finished(job_id, result, on_result))
+        worker.signals.error.connect(self._on_error)
+        self._worker = worker
+        self.pool.start(worker)
+
+    def _on_progress(self, job_id, fraction):
+        if job_id == self.job_id:
+            self.progress.emit(fraction)
+
+    def _on_finished(self, job_id, result, on_result):
+        if job_id != self.job_id:
+            return
+        self._worker = None
+        self.busy.emit(False)
+        on_result(result)
+
+    def _on_error(self, job_id, message):
+        if job_id != self.job_id:
+            return
+        self._worker = None
+        self.busy.emit(False)
+        print(message)
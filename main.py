@@ -1,8 +1,8 @@
-from PyQt5.QtWidgets import QApplication
-from gui.app import MainWindow
-
-
 def main():
+    # imported here, so worker processes importing this module don't load Qt
+    from PyQt5.QtWidgets import QApplication
+    from gui.app import MainWindow
+
     app = QApplication([])
     window = MainWindow()
     window.show()
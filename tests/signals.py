@@ -0,0 +1,45 @@
+"""
+Synthetic signals shared by the tests and benchmarks.
+"""
+import numpy as np
+
+from core.functions import scale_data
+
+
+def synthetic_signal(duration, fs, channels=1, seed=0):
+    """
+    Generate a scaled test signal: alternating tone bursts with harmonics, noise and silence.
+
+    Args:
+        duration (float) : signal length in sec
+        fs (int) : signal frequency
+        channels (int) : number of channels, channels differ in level and noise
+        seed (int) : random seed
+
+    Returns:
+        Signal scaled to [-1,1] (N, or N x channels)
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * fs)) / fs
+    pitch = 120 + 80 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / fs
+    signal = np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase)
+    signal *= (t % 1.0) < 0.7
+    if channels > 1:
+        signal = np.outer(signal, np.linspace(1, 0.5, channels))
+    signal += 0.01 * rng.standard_normal(signal.shape)
+    return scale_data(signal)
+
+
+_quantized = {}
+
+
+def quantized(signal):
+    """
+    Get int16 samples of a scaled signal and their scale, as read from a WAV file. Cached per signal.
+    """
+    if id(signal) not in _quantized:
+        _quantized.clear()
+        raw = np.round(signal * 32767).astype(np.int16)
+        _quantized[id(signal)] = signal, raw, int(np.max(np.abs(raw)))
+    return _quantized[id(signal)][1:]
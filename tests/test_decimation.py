@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from core.features import PITCH_DECIMATION_TOLERANCE, extract_features, pitch_error
+from core.functions import decimate, decimation_factor
+from tests.signals import synthetic_signal
+
+
+@pytest.mark.parametrize('fs', [16000, 44100, 48000])
+def test_decimated_pitch_within_tolerance(fs):
+    signal = synthetic_signal(10, fs)
+    reference, _ = extract_features(signal, fs)
+    tracks, _ = extract_features(signal, fs, decimate_pitch=True)
+    # frames whose full rate maximum is at a bound of the searched lags are left out by pitch_error
+    assert pitch_error(tracks['f0'], reference['f0'], reference['voicing'], fs) <= PITCH_DECIMATION_TOLERANCE
+    for name in reference:
+        if name not in ('f0', 'voicing', 'acf'):
+            np.testing.assert_array_equal(tracks[name], reference[name], err_msg=name)
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+def test_blockwise_decimation_equals_whole(channels):
+    signal = synthetic_signal(3, 44100, channels)
+    factor = decimation_factor(44100)
+    np.testing.assert_array_equal(decimate(signal, factor, block_size=10000),
+                                  decimate(signal, factor, block_size=len(signal)))
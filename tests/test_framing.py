@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from core.functions import framing, framing_stream, signal_blocks
+from tests.signals import synthetic_signal
+
+FS = 16000
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+@pytest.mark.parametrize('block_size', [1, 7, 159, 160, 400, 401, 4999, 1 << 20])
+@pytest.mark.parametrize('max_frames', [1, 3, 4096])
+def test_stream_equals_framing(channels, block_size, max_frames):
+    # 0.3 s plus a few samples, so the last frame is padded
+    signal = synthetic_signal(0.3, FS, channels)[:4813]
+    frames, _ = framing(signal, FS, 0.025, 0.01)
+    chunks = list(framing_stream(signal_blocks(signal, block_size), FS, 0.025, 0.01, max_frames=max_frames))
+    assert all(chunk.shape[-2] <= max_frames for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=-2), frames)
+
+
+@pytest.mark.parametrize('win_len, win_hop', [(0.025, 0.025), (0.05, 0.01), (0.01, 0.003)])
+def test_stream_equals_framing_for_any_hop(win_len, win_hop):
+    signal = synthetic_signal(0.2, 44100)
+    frames, _ = framing(signal, 44100, win_len, win_hop)
+    chunks = list(framing_stream(signal_blocks(signal, 1000), 44100, win_len, win_hop, max_frames=5))
+    np.testing.assert_array_equal(np.concatenate(chunks, axis=-2), frames)
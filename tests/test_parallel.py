@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import core.parallel
+from core.features import extract_features
+from core.functions import PRECISIONS
+from core.parallel import ParallelFrameExecutor
+from tests.signals import quantized, synthetic_signal
+
+FS = 16000
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with ParallelFrameExecutor(jobs=2) as executor:
+        yield executor
+
+
+def assert_same_features(actual, expected):
+    tracks, summary = actual
+    reference, reference_summary = expected
+    assert tracks.keys() == reference.keys()
+    for name in reference:
+        np.testing.assert_array_equal(tracks[name], reference[name], err_msg=name)
+    for name in reference_summary:
+        np.testing.assert_array_equal(summary[name], reference_summary[name], err_msg=name)
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+@pytest.mark.parametrize('decimate_pitch', [False, True])
+def test_parallel_equals_serial(executor, channels, decimate_pitch):
+    raw, scale = quantized(synthetic_signal(5, FS, channels))
+    mode = 'mid' if channels == 1 else 'channels'
+    # small chunks, so ranges are split between calls of the feature function
+    kwargs = {'scale': scale, 'channels': mode, 'chunk_size': 100, 'decimate_pitch': decimate_pitch}
+    assert_same_features(extract_features(raw, FS, executor=executor, **kwargs), extract_features(raw, FS, **kwargs))
+
+
+@pytest.mark.parametrize('precision', PRECISIONS)
+@pytest.mark.parametrize('channels', ['mid', 'max'])
+def test_parallel_converts_like_serial(executor, precision, channels):
+    raw, scale = quantized(synthetic_signal(3, FS, 2))
+    kwargs = {'scale': scale, 'channels': channels, 'precision': precision}
+    assert_same_features(extract_features(raw, FS, executor=executor, **kwargs), extract_features(raw, FS, **kwargs))
+
+
+def test_serial_fallback_without_shared_memory(monkeypatch):
+    def no_room(array):
+        raise OSError('no room')
+
+    monkeypatch.setattr(core.parallel, '_share', no_room)
+    raw, scale = quantized(synthetic_signal(3, FS, 2))
+    executor = ParallelFrameExecutor(jobs=2)
+    tracks = extract_features(raw, FS, scale=scale, channels='channels', executor=executor, decimate_pitch=True)
+    assert executor._pool is None
+    assert_same_features(tracks, extract_features(raw, FS, scale=scale, channels='channels', decimate_pitch=True))
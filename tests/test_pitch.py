@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from core.features import compute_features
+from core.functions import framing, scale_data
+
+PITCH_FEATURES = ['f0', 'yin_f0', 'amdf_f0']
+
+
+def harmonic_signal(pitch, fs, duration=1):
+    t = np.arange(int(duration * fs)) / fs
+    phase = 2 * np.pi * pitch * t
+    return scale_data(np.sin(phase) + 0.5 * np.sin(2 * phase) + 0.25 * np.sin(3 * phase))
+
+
+@pytest.mark.parametrize('fs', [16000, 44100])
+@pytest.mark.parametrize('pitch', [80, 150, 300])
+def test_trackers_find_pitch(fs, pitch):
+    frames, _ = framing(harmonic_signal(pitch, fs), fs, 0.04, 0.01)
+    values = compute_features(frames, PITCH_FEATURES + ['yin_confidence', 'yin_voiced'], fs)
+    for name in PITCH_FEATURES:
+        np.testing.assert_allclose(np.median(values[name]), pitch, rtol=0.02, err_msg=name)
+    assert values['yin_voiced'].all()
+    assert np.all((values['yin_confidence'] > 0.9) & (values['yin_confidence'] <= 1))
+
+
+def test_silence_is_unvoiced():
+    fs = 16000
+    frames, _ = framing(np.zeros(fs), fs, 0.04, 0.01)
+    values = compute_features(frames, ['yin_f0', 'yin_voiced', 'amdf_f0'], fs)
+    assert not values['yin_voiced'].any()
+    assert not values['yin_f0'].any() and not values['amdf_f0'].any()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from core.features import PRECISION_TOLERANCES, extract_features, track_errors
+from core.functions import PRECISIONS, hann_window
+from tests.signals import quantized, synthetic_signal
+
+FS = 16000
+
+
+@pytest.fixture(scope='module')
+def signal():
+    raw, scale = quantized(synthetic_signal(10, FS))
+    return raw.copy(), scale
+
+
+@pytest.mark.parametrize('precision', PRECISIONS[1:])
+@pytest.mark.parametrize('win_fun', [None, hann_window])
+def test_tracks_within_tolerance(signal, precision, win_fun):
+    raw, scale = signal
+    reference, _ = extract_features(raw, FS, scale=scale, win_fun=win_fun)
+    tracks, _ = extract_features(raw, FS, scale=scale, win_fun=win_fun, precision=precision)
+    errors = track_errors(tracks, reference)
+    assert max(errors.values()) <= PRECISION_TOLERANCES['frames'], errors
+
+
+def test_native_integer_tracks_exact(signal):
+    raw, scale = signal
+    reference, _ = extract_features(raw, FS, scale=scale)
+    tracks, _ = extract_features(raw, FS, scale=scale, precision='native')
+    # exact up to the final division by the squared scale
+    np.testing.assert_allclose(tracks['ste'], reference['ste'], rtol=1e-12)
+    for name in ('zcr', 'silence'):
+        np.testing.assert_array_equal(tracks[name], reference[name])
+
+
+@pytest.mark.parametrize('precision', PRECISIONS)
+def test_summary_matches_float64(signal, precision):
+    raw, scale = signal
+    _, reference = extract_features(raw, FS, scale=scale)
+    _, summary = extract_features(raw, FS, scale=scale, precision=precision)
+    assert summary.keys() == reference.keys()
+    for name, value in reference.items():
+        assert summary[name] == pytest.approx(value, rel=1e-9), name
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from core.features import signal_values
+from core.range_index import RangeIndex
+from tests.signals import quantized, synthetic_signal
+
+BLOCK_SIZE = 256
+RANGES = [(0, 1), (0, 100), (5, 257), (256, 512), (255, 513), (1000, 8000), (0, 16000), (15990, 16000)]
+
+
+def assert_values_equal(values, reference):
+    for name in ('zcr', 'amd'):
+        np.testing.assert_array_equal(values[name], reference[name], err_msg=name)
+    # sums are taken in another order
+    for name in ('ste', 'acf'):
+        np.testing.assert_allclose(values[name], reference[name], rtol=1e-9, atol=1e-12, err_msg=name)
+    np.testing.assert_allclose(values['volume'], np.sqrt(reference['ste']), rtol=1e-9)
+
+
+@pytest.mark.parametrize('channels, mode', [(1, 'mid'), (2, 'mid'), (2, 'max'), (2, 'channels')])
+def test_index_values_equal_signal_values(channels, mode):
+    raw, scale = quantized(synthetic_signal(1, 16000, channels))
+    index = RangeIndex(raw, 10, scale=scale, channels=mode, block_size=BLOCK_SIZE, read_blocks=3)
+    for start, stop in RANGES:
+        assert_values_equal(index.values(start, stop), signal_values(raw[start:stop], 10, mode, scale=scale))
+
+
+@pytest.mark.parametrize('lag', [0, 1, 300])
+def test_index_with_lag(lag):
+    raw, scale = quantized(synthetic_signal(1, 16000, 2))
+    index = RangeIndex(raw, 10, scale=scale, block_size=BLOCK_SIZE).with_lag(lag)
+    for start, stop in RANGES:
+        assert_values_equal(index.values(start, stop), signal_values(raw[start:stop], lag, scale=scale))